@@ -1264,7 +1264,8 @@ def run_analysis():
         # 跟踪已完成的分析师，避免重复提示
         completed_analysts = set()
 
-        for chunk in graph.graph.stream(init_agent_state, **args):
+        # subgraphs=True: 并行模式下各分析师在独立子图中运行，其消息与工具调用只出现在子图的输出中
+        for namespace, chunk in graph.graph.stream(init_agent_state, subgraphs=True, **args):
             if len(chunk["messages"]) > 0:
                 # Get the last message from the chunk
                 last_message = chunk["messages"][-1]
@@ -1562,7 +1563,8 @@ def run_analysis():
                 # Update the display
                 update_display(layout)
 
-            trace.append(chunk)
+            if not namespace:
+                trace.append(chunk)
 
         # 显示最终决策阶段
         ui.show_step_header(5, "投资决策生成 | Investment Decision Generation")
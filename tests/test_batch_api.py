@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+测试OpenAI Batch API传输层
+用假的files/batches客户端验证请求汇总、结果还原以及任务超时取消
+"""
+
+import json
+import threading
+from types import SimpleNamespace
+
+import httpx
+
+
+class FakeBatchClient:
+    """模拟OpenAI客户端的files/batches接口，任务在轮询若干次后结束"""
+
+    def __init__(self, polls_until_done=1):
+        self.polls_until_done = polls_until_done
+        self.created = []
+        self.cancelled = []
+        self._inputs = {}
+        self._polls = 0
+        self.files = SimpleNamespace(create=self._create_file, content=self._file_content)
+        self.batches = SimpleNamespace(create=self._create_batch, retrieve=self._retrieve, cancel=self._cancel)
+
+    def _create_file(self, file, purpose):
+        file_id = f"file-{len(self._inputs)}"
+        self._inputs[file_id] = file[1].decode("utf-8")
+        return SimpleNamespace(id=file_id)
+
+    def _create_batch(self, input_file_id, endpoint, completion_window):
+        self.created.append(input_file_id)
+        return self._job(input_file_id, "validating")
+
+    def _retrieve(self, job_id):
+        self._polls += 1
+        status = "completed" if self._polls >= self.polls_until_done else "in_progress"
+        return self._job(job_id, status)
+
+    def _cancel(self, job_id):
+        self.cancelled.append(job_id)
+
+    def _job(self, job_id, status):
+        return SimpleNamespace(id=job_id, status=status, output_file_id=f"out-{job_id}", error_file_id=None)
+
+    def _file_content(self, file_id):
+        lines = []
+        for line in self._inputs[file_id.removeprefix("out-")].splitlines():
+            item = json.loads(line)
+            content = item["body"]["messages"][0]["content"]
+            body = {"choices": [{"message": {"role": "assistant", "content": f"回复:{content}"}}]}
+            lines.append(json.dumps({"custom_id": item["custom_id"], "response": {"status_code": 200, "body": body}}))
+        return SimpleNamespace(text="\n".join(lines))
+
+
+def _make_client(fake, **kwargs):
+    from tradingagents.llm_adapters.batch_api import BatchAPITransport
+
+    passthrough = httpx.MockTransport(lambda request: httpx.Response(200, json={"passthrough": True}))
+    transport = BatchAPITransport(transport=passthrough, **kwargs)
+    transport._get_openai_client = lambda base_url, api_key: fake
+    return httpx.Client(transport=transport, base_url="https://api.example.com/v1")
+
+
+def _chat(client, content):
+    return client.post(
+        "/chat/completions",
+        json={"model": "gpt-4o-mini", "messages": [{"role": "user", "content": content}]},
+        headers={"Authorization": "Bearer sk-test"},
+    )
+
+
+def test_requests_share_one_batch():
+    """测试时间窗口内的并发请求合并为一个批处理任务，并按custom_id还原结果"""
+    print("🔧 测试请求汇总...")
+    fake = FakeBatchClient()
+    client = _make_client(fake, collect_window=0.2, poll_interval=0.01)
+
+    results = {}
+
+    def worker(content):
+        results[content] = _chat(client, content)
+
+    threads = [threading.Thread(target=worker, args=(content,)) for content in ("A", "B", "C")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(fake.created) == 1, f"期望1个批处理任务, 实际{len(fake.created)}"
+    for content, response in results.items():
+        assert response.status_code == 200
+        assert response.json()["choices"][0]["message"]["content"] == f"回复:{content}"
+
+    assert client.get("/models").json() == {"passthrough": True}
+    print("✅ 请求汇总测试通过")
+
+
+def test_batch_timeout_cancels_job():
+    """测试任务超过最长等待时间后被取消，请求以超时失败"""
+    print("🔧 测试任务超时...")
+    fake = FakeBatchClient(polls_until_done=10 ** 6)
+    client = _make_client(fake, collect_window=0.01, poll_interval=0.01, timeout=0.1)
+
+    try:
+        _chat(client, "A")
+        raise AssertionError("期望任务超时")
+    except TimeoutError:
+        pass
+    assert fake.cancelled == ["file-0"], f"期望任务被取消, 实际{fake.cancelled}"
+    print("✅ 任务超时测试通过")
+
+
+if __name__ == "__main__":
+    test_requests_share_one_batch()
+    test_batch_timeout_cancels_job()
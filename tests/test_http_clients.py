@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+测试共享LLM HTTP客户端
+验证环境变量中的代理设置会挂载到共享客户端，并且代理传输层同样经过限流与去重包装
+"""
+
+import httpx
+import pytest
+
+
+def _set_proxy_env(monkeypatch):
+    for name in ("HTTP_PROXY", "HTTPS_PROXY", "ALL_PROXY", "NO_PROXY",
+                 "http_proxy", "https_proxy", "all_proxy", "no_proxy"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("HTTPS_PROXY", "http://proxy.company.com:8080")
+    monkeypatch.setenv("NO_PROXY", "localhost,.internal.example.com")
+
+
+def test_proxy_mounts_from_environment(monkeypatch):
+    """测试按HTTPS_PROXY与NO_PROXY构建挂载表"""
+    print("🔧 测试环境代理挂载...")
+    from tradingagents.llm_adapters.http_clients import get_proxy_mounts
+
+    _set_proxy_env(monkeypatch)
+    mounts = get_proxy_mounts(lambda proxy: proxy)
+    assert mounts == {
+        "https://": "http://proxy.company.com:8080",
+        "all://localhost": None,
+        "all://*internal.example.com": None,
+    }, mounts
+
+    monkeypatch.setenv("NO_PROXY", "*")
+    assert get_proxy_mounts(lambda proxy: proxy) == {}
+    print("✅ 环境代理挂载测试通过")
+
+
+def test_shared_clients_use_proxy(monkeypatch):
+    """测试共享的同步/异步客户端按环境代理路由，且代理传输层保留限流与去重"""
+    print("🔧 测试共享客户端代理...")
+    from tradingagents.llm_adapters import http_clients
+    from tradingagents.llm_adapters.request_dedup import AsyncDedupTransport, DedupTransport
+
+    _set_proxy_env(monkeypatch)
+    monkeypatch.setattr(http_clients, "_sync_clients", {})
+    monkeypatch.setattr(http_clients, "_async_clients", {})
+
+    for client, wrapper in (
+        (http_clients.get_http_client(dedup=True), DedupTransport),
+        (http_clients.get_async_http_client(dedup=True), AsyncDedupTransport),
+    ):
+        proxied = client._transport_for_url(httpx.URL("https://api.openai.com/v1/chat/completions"))
+        assert proxied is not client._transport, "期望HTTPS请求走代理"
+        assert isinstance(proxied, wrapper)
+        direct = client._transport_for_url(httpx.URL("https://llm.internal.example.com/v1"))
+        assert direct is client._transport, "期望NO_PROXY中的主机直连"
+    print("✅ 共享客户端代理测试通过")
+
+
+def test_batch_client_uses_proxy(monkeypatch):
+    """测试Batch API客户端的代理挂载仍经过批处理传输层"""
+    print("🔧 测试Batch API客户端代理...")
+    from tradingagents.llm_adapters.batch_api import BatchAPITransport, get_batch_http_client
+
+    _set_proxy_env(monkeypatch)
+    client = get_batch_http_client(collect_window=0.5, poll_interval=1.0, timeout=10.0)
+    proxied = client._transport_for_url(httpx.URL("https://api.openai.com/v1/chat/completions"))
+    assert proxied is not client._transport
+    assert isinstance(proxied, BatchAPITransport)
+    print("✅ Batch API客户端代理测试通过")
+
+
+if __name__ == "__main__":
+    with pytest.MonkeyPatch.context() as mp:
+        test_proxy_mounts_from_environment(mp)
+    with pytest.MonkeyPatch.context() as mp:
+        test_shared_clients_use_proxy(mp)
+    with pytest.MonkeyPatch.context() as mp:
+        test_batch_client_uses_proxy(mp)
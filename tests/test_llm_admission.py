@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+测试LLM准入控制
+验证令牌桶等待时间、舱壁并发上限以及异步取消后名额归还
+"""
+
+import asyncio
+import time
+
+
+def test_token_bucket_wait():
+    """测试令牌桶额度用尽后返回等待时间，退还后恢复"""
+    print("🔧 测试令牌桶...")
+    from tradingagents.llm_adapters.admission import TokenBucket
+
+    bucket = TokenBucket(tokens_per_minute=600)  # 每秒补充10个
+    assert bucket.reserve(600) == 0.0
+    wait = bucket.reserve(50)
+    assert 4.5 < wait <= 5.0, f"期望约5秒等待, 实际{wait}"
+    bucket.refund(50)
+    assert bucket.reserve(1) < 0.2
+    print("✅ 令牌桶测试通过")
+
+
+def test_bulkhead_caps_inflight():
+    """测试舱壁并发上限与超时失败"""
+    print("🔧 测试舱壁并发上限...")
+    from tradingagents.llm_adapters.admission import Bulkhead
+
+    bulkhead = Bulkhead(max_inflight=1, tokens_per_minute=100000, timeout=0.1)
+    bulkhead.acquire(10)
+    start = time.monotonic()
+    try:
+        bulkhead.acquire(10)
+        raise AssertionError("期望第二个调用因并发上限超时")
+    except TimeoutError:
+        pass
+    assert time.monotonic() - start >= 0.1
+    bulkhead.release()
+    bulkhead.acquire(10)
+    bulkhead.release()
+    print("✅ 舱壁并发上限测试通过")
+
+
+def test_cancelled_acquire_keeps_slots():
+    """测试等待名额时被取消不会占用名额"""
+    print("🔧 测试取消等待...")
+    from tradingagents.llm_adapters.admission import Bulkhead
+
+    bulkhead = Bulkhead(max_inflight=1, tokens_per_minute=100000, timeout=None)
+
+    async def run():
+        await bulkhead.aacquire(10)
+        waiter = asyncio.create_task(bulkhead.aacquire(10))
+        await asyncio.sleep(0.1)
+        waiter.cancel()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            pass
+        bulkhead.release()
+        # 被取消的等待者未占用名额，新的调用可以立即进入
+        await asyncio.wait_for(bulkhead.aacquire(10), timeout=1)
+        bulkhead.release()
+
+    asyncio.run(run())
+    print("✅ 取消等待测试通过")
+
+
+if __name__ == "__main__":
+    test_token_bucket_wait()
+    test_bulkhead_caps_inflight()
+    test_cancelled_acquire_keeps_slots()
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+测试LLM磁盘缓存
+验证响应按提示与模型参数写入SQLite并可在新连接中读回
+"""
+
+import os
+import tempfile
+
+
+def test_sqlite_llm_cache_roundtrip():
+    """测试缓存写入与读取"""
+    print("🔧 测试LLM磁盘缓存...")
+    from langchain_core.messages import AIMessage
+    from langchain_core.outputs import ChatGeneration
+    from tradingagents.llm_adapters.llm_cache import SQLiteLLMCache
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "llm_cache.sqlite")
+        cache = SQLiteLLMCache(path)
+        generations = [ChatGeneration(message=AIMessage(content="买入"))]
+
+        assert cache.lookup("分析AAPL", "model=gpt-4o-mini,temperature=0.1") is None
+        cache.update("分析AAPL", "model=gpt-4o-mini,temperature=0.1", generations)
+
+        # 新连接读取，模拟下一次回测运行
+        reloaded = SQLiteLLMCache(path)
+        cached = reloaded.lookup("分析AAPL", "model=gpt-4o-mini,temperature=0.1")
+        assert cached is not None and cached[0].message.content == "买入"
+
+        # 模型参数不同则不命中
+        assert reloaded.lookup("分析AAPL", "model=gpt-4o,temperature=0.1") is None
+
+        reloaded.clear()
+        assert reloaded.lookup("分析AAPL", "model=gpt-4o-mini,temperature=0.1") is None
+    print("✅ LLM磁盘缓存测试通过")
+
+
+if __name__ == "__main__":
+    test_sqlite_llm_cache_roundtrip()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+测试LLM客户端缓存
+验证相同配置复用同一客户端，运行时更换API密钥后创建新的客户端
+"""
+
+import pytest
+
+CONFIG = {
+    "backend_url": "https://api.openai.com/v1",
+    "deep_think_llm": "gpt-4o",
+    "quick_think_llm": "gpt-4o-mini",
+}
+
+
+def _graph():
+    from tradingagents.graph.trading_graph import TradingAgentsGraph
+    return TradingAgentsGraph.__new__(TradingAgentsGraph)
+
+
+def test_openai_key_rotation_creates_new_client(monkeypatch):
+    """测试更换OPENAI_API_KEY后不再复用旧密钥的客户端"""
+    print("🔧 测试OpenAI密钥更换...")
+    graph = _graph()
+
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-old")
+    deep, quick = graph._build_openai(CONFIG)
+    assert graph._build_openai(CONFIG) == (deep, quick), "相同配置应复用缓存的客户端"
+
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-new")
+    new_deep, new_quick = graph._build_openai(CONFIG)
+    assert new_deep is not deep and new_quick is not quick
+    assert new_deep.openai_api_key.get_secret_value() == "sk-new"
+    print("✅ OpenAI密钥更换测试通过")
+
+
+def test_anthropic_key_rotation_creates_new_client(monkeypatch):
+    """测试更换ANTHROPIC_API_KEY后不再复用旧密钥的客户端"""
+    print("🔧 测试Anthropic密钥更换...")
+    pytest.importorskip("langchain_anthropic")
+    graph = _graph()
+    config = {**CONFIG, "backend_url": "https://api.anthropic.com",
+              "deep_think_llm": "claude-3-5-sonnet-latest", "quick_think_llm": "claude-3-5-haiku-latest"}
+
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "sk-ant-old")
+    deep, _ = graph._build_anthropic(config)
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "sk-ant-new")
+    new_deep, _ = graph._build_anthropic(config)
+    assert new_deep is not deep
+    assert new_deep.anthropic_api_key.get_secret_value() == "sk-ant-new"
+    print("✅ Anthropic密钥更换测试通过")
+
+
+if __name__ == "__main__":
+    with pytest.MonkeyPatch.context() as mp:
+        test_openai_key_rotation_creates_new_client(mp)
+    with pytest.MonkeyPatch.context() as mp:
+        test_anthropic_key_rotation_creates_new_client(mp)
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+测试LLM熔断与降级链
+验证主提供商连续失败后熔断，请求直接路由到备用提供商
+"""
+
+
+import time
+
+
+class FakeAPIError(Exception):
+    """带HTTP状态码的假提供商错误"""
+
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class FakeLLM:
+    """记录调用次数的假LLM，fail为失败时返回的HTTP状态码"""
+
+    def __init__(self, name, fail=None):
+        self.name = name
+        self.fail = fail
+        self.calls = 0
+
+    def invoke(self, input, config=None, **kwargs):
+        self.calls += 1
+        if self.fail:
+            raise FakeAPIError(self.fail)
+        return f"{self.name}:{input}"
+
+
+def test_fallback_and_circuit_breaker():
+    """测试降级与熔断"""
+    print("🔧 测试降级与熔断...")
+    from tradingagents.llm_adapters.fallback import FallbackLLM, get_circuit_breaker
+
+    primary = FakeLLM("primary", fail=503)
+    secondary = FakeLLM("secondary")
+    llm = FallbackLLM(
+        [("test_primary", primary), ("test_secondary", secondary)],
+        failure_threshold=3,
+        cooldown=60,
+    )
+
+    for i in range(5):
+        assert llm.invoke(f"提示{i}") == f"secondary:提示{i}"
+
+    # 前3次失败后熔断，之后不再调用主提供商
+    assert primary.calls == 3, f"期望主提供商被调用3次, 实际{primary.calls}次"
+    assert secondary.calls == 5
+    assert get_circuit_breaker("test_primary").is_open
+    assert not get_circuit_breaker("test_secondary").is_open
+    assert llm.__class__ is FakeLLM
+    print("✅ 降级与熔断测试通过")
+
+
+def test_half_open_probe_checked_lazily():
+    """测试主提供商成功时不消耗已熔断备用提供商的半开试探名额"""
+    print("🔧 测试半开试探...")
+    from tradingagents.llm_adapters.fallback import FallbackLLM, get_circuit_breaker
+
+    primary = FakeLLM("primary")
+    secondary = FakeLLM("secondary")
+    llm = FallbackLLM(
+        [("test_probe_primary", primary), ("test_probe_secondary", secondary)],
+        failure_threshold=1,
+        cooldown=0.1,
+    )
+    get_circuit_breaker("test_probe_secondary", 1, 0.1).record_failure()
+    time.sleep(0.15)
+
+    # 冷却结束后主提供商仍正常，本次调用不应占用备用提供商的试探名额
+    assert llm.invoke("提示1") == "primary:提示1"
+    primary.fail = 503
+    assert llm.invoke("提示2") == "secondary:提示2"
+    assert secondary.calls == 1
+    assert not get_circuit_breaker("test_probe_secondary").is_open
+    print("✅ 半开试探测试通过")
+
+
+def test_client_errors_do_not_trip_breaker():
+    """测试400等请求错误直接抛出，不计入熔断也不降级"""
+    print("🔧 测试请求错误...")
+    from tradingagents.llm_adapters.fallback import FallbackLLM, get_circuit_breaker
+
+    primary = FakeLLM("primary", fail=400)
+    secondary = FakeLLM("secondary")
+    llm = FallbackLLM(
+        [("test_bad_request_primary", primary), ("test_bad_request_secondary", secondary)],
+        failure_threshold=1,
+        cooldown=60,
+    )
+    try:
+        llm.invoke("提示")
+        raise AssertionError("期望400错误直接抛出")
+    except FakeAPIError as e:
+        assert e.status_code == 400
+    assert secondary.calls == 0
+    assert not get_circuit_breaker("test_bad_request_primary").is_open
+    print("✅ 请求错误测试通过")
+
+
+if __name__ == "__main__":
+    test_fallback_and_circuit_breaker()
+    test_half_open_probe_checked_lazily()
+    test_client_errors_do_not_trip_breaker()
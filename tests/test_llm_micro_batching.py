@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+测试LLM微批处理
+验证并发提示被合并为一次调用，并在无法拆分时退回逐个调用
+"""
+
+import json
+import threading
+
+
+class FakeLLM:
+    """记录调用次数的假LLM"""
+
+    def __init__(self, batch_reply=True):
+        self.batch_reply = batch_reply
+        self.invoke_calls = 0
+        self.batch_calls = 0
+
+    def invoke(self, messages, **kwargs):
+        from langchain_core.messages import AIMessage
+
+        self.invoke_calls += 1
+        tasks = json.loads(messages[1][1])
+        if not self.batch_reply:
+            return AIMessage(content="无法解析")
+        return AIMessage(content=json.dumps(
+            [{"id": task["id"], "output": f"回复:{task['messages'][-1]['content']}"} for task in tasks],
+            ensure_ascii=False,
+        ))
+
+    def batch(self, inputs, return_exceptions=False):
+        from langchain_core.messages import AIMessage
+
+        self.batch_calls += 1
+        return [AIMessage(content=f"单独回复:{messages[-1][1]}") for messages in inputs]
+
+
+def _run_concurrently(batcher, count):
+    results = [None] * count
+
+    def worker(index):
+        results[index] = batcher.invoke([("system", "提取决策"), ("human", f"报告{index}")]).content
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_micro_batching_merges_requests():
+    """测试并发请求合并"""
+    print("🔧 测试并发请求合并...")
+    from tradingagents.llm_adapters.batching import MicroBatcher
+
+    llm = FakeLLM()
+    batcher = MicroBatcher(llm, max_batch=4, max_wait_ms=200)
+    results = _run_concurrently(batcher, 4)
+
+    assert llm.invoke_calls == 1, f"期望1次合并调用, 实际{llm.invoke_calls}次"
+    assert sorted(results) == sorted(f"回复:报告{i}" for i in range(4))
+    print("✅ 并发请求合并测试通过")
+
+
+def test_micro_batching_fallback():
+    """测试合并结果无法解析时退回逐个调用"""
+    print("🔧 测试退回逐个调用...")
+    from tradingagents.llm_adapters.batching import MicroBatcher
+
+    llm = FakeLLM(batch_reply=False)
+    batcher = MicroBatcher(llm, max_batch=2, max_wait_ms=200)
+    results = _run_concurrently(batcher, 2)
+
+    assert llm.batch_calls == 1
+    assert sorted(results) == ["单独回复:报告0", "单独回复:报告1"]
+    print("✅ 退回逐个调用测试通过")
+
+
+def test_micro_batching_shared_across_proxies():
+    """测试不同图实例的代理共享同一个底层批处理器"""
+    print("🔧 测试跨图共享批处理器...")
+    from tradingagents.llm_adapters.admission import AdmissionControlledLLM, Bulkhead
+    from tradingagents.llm_adapters.batching import MicroBatcher, with_micro_batching
+
+    llm = FakeLLM()
+    first = with_micro_batching(AdmissionControlledLLM(llm, Bulkhead()))
+    second = with_micro_batching(AdmissionControlledLLM(llm, Bulkhead()))
+
+    assert type(first) is AdmissionControlledLLM and type(second) is AdmissionControlledLLM
+    assert first.bulkhead is not second.bulkhead
+    assert isinstance(first.llm, MicroBatcher) and first.llm is second.llm
+    print("✅ 跨图共享批处理器测试通过")
+
+
+if __name__ == "__main__":
+    test_micro_batching_merges_requests()
+    test_micro_batching_fallback()
+    test_micro_batching_shared_across_proxies()
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+测试LLM提供商分发表
+验证提供商名称归一化及别名映射是否正确
+"""
+
+def test_normalize_provider():
+    """测试提供商名称归一化"""
+    print("🔧 测试提供商名称归一化...")
+
+    from tradingagents.graph.trading_graph import TradingAgentsGraph, _normalize_provider
+
+    test_cases = {
+        "openai": "openai",
+        " OpenAI ": "openai",
+        "Anthropic": "anthropic",
+        "alibaba": "dashscope",
+        "阿里百炼": "dashscope",
+        "DashScope": "dashscope",
+        "dashscope-qwen": "dashscope",
+        "deepseek-v3": "deepseek",
+        "custom_openai": "custom_openai",
+        "qianfan": "qianfan",
+    }
+
+    for name, expected in test_cases.items():
+        result = _normalize_provider(name)
+        print(f"  {name!r} -> {result!r}")
+        assert result == expected, f"期望 {expected}, 得到 {result}"
+        assert result in TradingAgentsGraph.PROVIDERS
+
+    assert _normalize_provider("unknown") not in TradingAgentsGraph.PROVIDERS
+    print("✅ 提供商名称归一化测试通过")
+
+
+if __name__ == "__main__":
+    test_normalize_provider()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+测试分析师并行执行
+用假节点构建完整的图，验证并行扇出与顺序执行得到相同的报告
+"""
+
+import tempfile
+from pathlib import Path
+
+import pytest
+from langchain_core.messages import AIMessage, ToolMessage
+
+ANALYSTS = ["market", "social", "news", "fundamentals"]
+REPORT_KEYS = {
+    "market": "market_report",
+    "social": "sentiment_report",
+    "news": "news_report",
+    "fundamentals": "fundamentals_report",
+}
+
+
+def _fake_analyst(analyst_type):
+    """第一次调用请求工具，拿到工具结果后写出报告"""
+
+    def factory(llm, toolkit):
+        def node(state):
+            last_message = state["messages"][-1]
+            if isinstance(last_message, ToolMessage):
+                report = f"{analyst_type}:{state['company_of_interest']}:{last_message.content}"
+                return {"messages": [AIMessage(content=report)], REPORT_KEYS[analyst_type]: report}
+            tool_call = {"name": f"get_{analyst_type}", "args": {}, "id": f"call_{analyst_type}"}
+            return {"messages": [AIMessage(content="", tool_calls=[tool_call])]}
+        return node
+
+    return factory
+
+
+def _fake_tool_node(analyst_type):
+    def node(state):
+        return {"messages": [ToolMessage(content=f"{analyst_type}数据", tool_call_id=f"call_{analyst_type}")]}
+    return node
+
+
+def _fake_step(key):
+    def factory(*args):
+        def node(state):
+            reports = "|".join(state.get(REPORT_KEYS[a], "") for a in ANALYSTS)
+            return {key: reports}
+        return node
+    return factory
+
+
+def _install_fake_agents(monkeypatch):
+    """用假节点替换智能体构造函数，测试结束后由monkeypatch还原"""
+    import tradingagents.agents as agents
+
+    fakes = {
+        "create_market_analyst": _fake_analyst("market"),
+        "create_social_media_analyst": _fake_analyst("social"),
+        "create_news_analyst": _fake_analyst("news"),
+        "create_fundamentals_analyst": _fake_analyst("fundamentals"),
+        "create_bull_researcher": _fake_step("investment_plan"),
+        "create_bear_researcher": _fake_step("investment_plan"),
+        "create_research_manager": _fake_step("investment_plan"),
+        "create_trader": _fake_step("trader_investment_plan"),
+        "create_risky_debator": _fake_step("final_trade_decision"),
+        "create_safe_debator": _fake_step("final_trade_decision"),
+        "create_neutral_debator": _fake_step("final_trade_decision"),
+        "create_risk_manager": _fake_step("final_trade_decision"),
+    }
+    # 包按需导入构造函数，直接写模块字典，避免setattr读取原值时导入真实的智能体
+    for name, fake in fakes.items():
+        monkeypatch.setitem(vars(agents), name, fake)
+
+
+def _build_graph(parallel):
+    from tradingagents.graph.conditional_logic import ConditionalLogic
+    from tradingagents.graph.propagation import Propagator
+    from tradingagents.graph.setup import GraphSetup
+
+    class DirectLogic(ConditionalLogic):
+        """分析师按真实逻辑路由，辩论环节直接交给裁判"""
+
+        def should_continue_debate(self, state):
+            return "Research Manager"
+
+        def should_continue_risk_analysis(self, state):
+            return "Risk Judge"
+
+    setup = GraphSetup(
+        None, None, None,
+        {analyst: _fake_tool_node(analyst) for analyst in ANALYSTS},
+        None, None, None, None, None,
+        DirectLogic(),
+        {"parallel_analysts": parallel},
+    )
+    propagator = Propagator()
+    state = propagator.create_initial_state("AAPL", "2024-05-10")
+    return setup.setup_graph(ANALYSTS), state, propagator.get_graph_args()
+
+
+def _run_graph(parallel):
+    graph, state, args = _build_graph(parallel)
+    return graph.invoke(state, **args)
+
+
+def test_parallel_matches_sequential(monkeypatch):
+    """测试并行与顺序执行结果一致"""
+    print("🔧 测试分析师并行执行...")
+    _install_fake_agents(monkeypatch)
+
+    parallel_state = _run_graph(parallel=True)
+    sequential_state = _run_graph(parallel=False)
+
+    for analyst, key in REPORT_KEYS.items():
+        expected = f"{analyst}:AAPL:{analyst}数据"
+        assert parallel_state[key] == expected, f"并行模式{key}错误: {parallel_state[key]!r}"
+        assert sequential_state[key] == expected, f"顺序模式{key}错误: {sequential_state[key]!r}"
+    assert parallel_state["final_trade_decision"] == sequential_state["final_trade_decision"]
+    print("✅ 分析师并行执行测试通过")
+
+
+def test_parallel_stream_surfaces_analyst_messages(monkeypatch):
+    """测试并行模式下按subgraphs=True流式输出时能看到各分析师的工具调用（CLI实时面板依赖此输出）"""
+    print("🔧 测试并行模式流式输出...")
+    _install_fake_agents(monkeypatch)
+
+    graph, state, args = _build_graph(parallel=True)
+    tool_calls = set()
+    for namespace, chunk in graph.stream(state, subgraphs=True, **args):
+        if chunk["messages"]:
+            tool_calls.update(call["name"] for call in getattr(chunk["messages"][-1], "tool_calls", []))
+    assert tool_calls == {f"get_{analyst}" for analyst in ANALYSTS}, f"工具调用缺失: {tool_calls}"
+    print("✅ 并行模式流式输出测试通过")
+
+
+def test_log_state_uses_final_state_ticker(tmp_path, monkeypatch):
+    """测试状态日志按最终状态中的股票写入目录，不受重叠调用改写的self.ticker影响"""
+    print("🔧 测试状态日志目录...")
+    from collections import OrderedDict
+    from tradingagents.graph.trading_graph import TradingAgentsGraph
+
+    monkeypatch.chdir(tmp_path)
+    graph = TradingAgentsGraph.__new__(TradingAgentsGraph)
+    graph.log_states_dict = OrderedDict()
+    graph.ticker = "MSFT"  # 另一个并发调用设置的股票
+
+    debate = {key: "" for key in ("bull_history", "bear_history", "history", "current_response", "judge_decision")}
+    risk = {key: "" for key in ("risky_history", "safe_history", "neutral_history", "history", "judge_decision")}
+    final_state = {
+        "company_of_interest": "AAPL",
+        "trade_date": "2024-05-10",
+        "investment_debate_state": debate,
+        "risk_debate_state": risk,
+        **{key: "" for key in (
+            "market_report", "sentiment_report", "news_report", "fundamentals_report",
+            "trader_investment_plan", "investment_plan", "final_trade_decision",
+        )},
+    }
+    graph._log_state("2024-05-10", final_state)
+
+    assert (tmp_path / "eval_results/AAPL/TradingAgentsStrategy_logs/full_states_log.jsonl").exists()
+    assert not (tmp_path / "eval_results/MSFT").exists()
+    print("✅ 状态日志目录测试通过")
+
+
+if __name__ == "__main__":
+    with pytest.MonkeyPatch.context() as mp:
+        test_parallel_matches_sequential(mp)
+    with pytest.MonkeyPatch.context() as mp:
+        test_parallel_stream_surfaces_analyst_messages(mp)
+    with tempfile.TemporaryDirectory() as tmp, pytest.MonkeyPatch.context() as mp:
+        test_log_state_uses_final_state_ticker(Path(tmp), mp)
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+测试自适应限流
+验证AIMD并发调整、429退避、按API密钥隔离以及请求取消后名额归还
+"""
+
+import asyncio
+
+
+def _limiter(host, authorization=""):
+    from tradingagents.llm_adapters.rate_limiter import get_rate_limiter
+    return get_rate_limiter(host, authorization)
+
+
+def test_aimd_and_remaining_requests():
+    """测试成功时并发上限增加，并受剩余请求数限制"""
+    print("🔧 测试AIMD并发调整...")
+    import httpx
+    from tradingagents.llm_adapters.rate_limiter import RateLimitedTransport
+
+    remaining = {"value": "100"}
+
+    def handler(request):
+        return httpx.Response(200, headers={"x-ratelimit-remaining-requests": remaining["value"]})
+
+    client = httpx.Client(transport=RateLimitedTransport(httpx.MockTransport(handler)))
+    limiter = _limiter("aimd.test")
+    limiter.limit = 4
+
+    client.post("https://aimd.test/v1/chat/completions", json={})
+    assert limiter.limit == 5, f"期望并发上限加一, 实际{limiter.limit}"
+
+    remaining["value"] = "2"
+    client.post("https://aimd.test/v1/chat/completions", json={})
+    assert limiter.limit == 2, f"期望并发上限受剩余请求数限制, 实际{limiter.limit}"
+    assert limiter._inflight == 0
+    print("✅ AIMD并发调整测试通过")
+
+
+def test_429_halves_limit_and_pauses():
+    """测试429时并发上限减半并暂停发送"""
+    print("🔧 测试429退避...")
+    import time
+    import httpx
+    from tradingagents.llm_adapters.rate_limiter import RateLimitedTransport
+
+    def handler(request):
+        return httpx.Response(429, headers={"retry-after": "2"})
+
+    client = httpx.Client(transport=RateLimitedTransport(httpx.MockTransport(handler)))
+    limiter = _limiter("throttled.test")
+    limiter.limit = 8
+
+    response = client.post("https://throttled.test/v1/chat/completions", json={})
+    assert response.status_code == 429
+    assert limiter.limit == 4, f"期望并发上限减半, 实际{limiter.limit}"
+    assert limiter._resume_at > time.monotonic() + 1
+    assert limiter._try_enter() > 0, "暂停期间不应放行请求"
+    assert limiter._inflight == 0
+    print("✅ 429退避测试通过")
+
+
+def test_limiters_are_per_api_key():
+    """测试一个密钥收到429不影响同一主机上的其他密钥"""
+    print("🔧 测试按密钥隔离限流...")
+    import httpx
+    from tradingagents.llm_adapters.rate_limiter import RateLimitedTransport
+
+    def handler(request):
+        if request.headers["authorization"] == "Bearer sk-throttled":
+            return httpx.Response(429, headers={"retry-after": "2"})
+        return httpx.Response(200, headers={"x-ratelimit-remaining-requests": "50"})
+
+    client = httpx.Client(transport=RateLimitedTransport(httpx.MockTransport(handler)))
+    throttled = _limiter("shared.test", "Bearer sk-throttled")
+    healthy = _limiter("shared.test", "Bearer sk-healthy")
+    throttled.limit = healthy.limit = 8
+
+    client.post("https://shared.test/v1/chat/completions", json={},
+                headers={"Authorization": "Bearer sk-throttled"})
+    assert throttled.limit == 4
+    assert healthy.limit == 8, "其他密钥的并发上限不应被减半"
+    assert healthy._try_enter() == 0, "其他密钥不应被暂停"
+    healthy.release()
+    print("✅ 按密钥隔离限流测试通过")
+
+
+def test_cancelled_request_releases_slot():
+    """测试异步请求被取消后归还并发名额"""
+    print("🔧 测试取消请求归还名额...")
+    import httpx
+    from tradingagents.llm_adapters.rate_limiter import AsyncRateLimitedTransport
+
+    class HangingTransport(httpx.AsyncBaseTransport):
+        async def handle_async_request(self, request):
+            await asyncio.sleep(3600)
+
+    async def run():
+        transport = AsyncRateLimitedTransport(HangingTransport())
+        request = httpx.Request("POST", "https://cancel.test/v1/chat/completions", json={})
+        task = asyncio.create_task(transport.handle_async_request(request))
+        await asyncio.sleep(0.05)
+        assert _limiter("cancel.test")._inflight == 1
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    asyncio.run(run())
+    assert _limiter("cancel.test")._inflight == 0, "取消后名额未归还"
+    print("✅ 取消请求归还名额测试通过")
+
+
+if __name__ == "__main__":
+    test_aimd_and_remaining_requests()
+    test_429_halves_limit_and_pauses()
+    test_limiters_are_per_api_key()
+    test_cancelled_request_releases_slot()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+测试LLM请求在途去重
+验证完全相同的并发POST请求只向上游发送一次，且gzip流式响应能被每个请求正确解码
+"""
+
+import asyncio
+import gzip
+import json
+
+import httpx
+
+RESPONSE_BODY = {"choices": [{"message": {"role": "assistant", "content": "去重响应"}}]}
+
+
+def _make_client(dedup=True):
+    """返回（可选）经过去重传输层的异步客户端及上游调用计数"""
+    from tradingagents.llm_adapters.request_dedup import AsyncDedupTransport
+
+    calls = []
+
+    async def gzip_stream():
+        compressed = gzip.compress(json.dumps(RESPONSE_BODY, ensure_ascii=False).encode("utf-8"))
+        for i in range(0, len(compressed), 8):
+            await asyncio.sleep(0.01)
+            yield compressed[i:i + 8]
+
+    async def handler(request):
+        calls.append(request)
+        await asyncio.sleep(0.1)
+        return httpx.Response(200, headers={"content-encoding": "gzip"}, content=gzip_stream())
+
+    transport = httpx.MockTransport(handler)
+    if dedup:
+        transport = AsyncDedupTransport(transport)
+    return httpx.AsyncClient(transport=transport, base_url="https://api.example.com/v1"), calls
+
+
+async def _post_concurrently(client, count=3):
+    payload = {"model": "gpt-4o-mini", "messages": [{"role": "user", "content": "分析AAPL"}]}
+    return await asyncio.gather(*[
+        client.post("/chat/completions", json=payload, headers={"Authorization": "Bearer sk-test"})
+        for _ in range(count)
+    ])
+
+
+def test_identical_requests_share_upstream_call():
+    """测试去重传输层上三个相同的并发请求共享一次上游调用"""
+    print("🔧 测试在途请求去重...")
+    client, calls = _make_client()
+    responses = asyncio.run(_post_concurrently(client))
+
+    assert len(calls) == 1, f"期望1次上游调用, 实际{len(calls)}"
+    for response in responses:
+        assert response.status_code == 200
+        assert response.json() == RESPONSE_BODY
+    print("✅ 在途请求去重测试通过")
+
+
+def test_dedup_is_per_client():
+    """测试去重是客户端属性：开启与未开启去重的配置得到不同的共享客户端"""
+    print("🔧 测试按客户端开启去重...")
+    from tradingagents.graph.trading_graph import _get_llm
+    from tradingagents.llm_adapters.http_clients import get_async_http_client
+    from tradingagents.llm_adapters.request_dedup import AsyncDedupTransport
+
+    assert not isinstance(get_async_http_client()._transport, AsyncDedupTransport)
+    assert isinstance(get_async_http_client(dedup=True)._transport, AsyncDedupTransport)
+
+    plain = _get_llm("openai", "gpt-4o-mini", api_key="sk-test")
+    dedup = _get_llm("openai", "gpt-4o-mini", api_key="sk-test", request_dedup=True)
+    assert plain is not dedup
+    assert plain.http_async_client is get_async_http_client()
+    assert dedup.http_async_client is get_async_http_client(dedup=True)
+
+    client, calls = _make_client(dedup=False)
+    asyncio.run(_post_concurrently(client))
+    assert len(calls) == 3, f"期望未去重时3次上游调用, 实际{len(calls)}"
+    print("✅ 按客户端开启去重测试通过")
+
+
+def test_owner_cancellation_does_not_cancel_waiters():
+    """测试发起方被取消时，等待中的相同请求重新发送而不是一起被取消"""
+    print("🔧 测试发起方取消...")
+    from tradingagents.llm_adapters.request_dedup import AsyncDedupTransport
+
+    calls = []
+
+    async def handler(request):
+        calls.append(request)
+        # 第一次调用足够慢，保证发起方在响应返回前被取消
+        await asyncio.sleep(1.0 if len(calls) == 1 else 0.01)
+
+        async def body():
+            yield json.dumps(RESPONSE_BODY).encode("utf-8")
+
+        return httpx.Response(200, content=body())
+
+    async def run():
+        client = httpx.AsyncClient(
+            transport=AsyncDedupTransport(httpx.MockTransport(handler)), base_url="https://api.example.com/v1"
+        )
+        owner = asyncio.create_task(_post_concurrently(client, count=1))
+        await asyncio.sleep(0.05)
+        waiter = asyncio.create_task(_post_concurrently(client, count=1))
+        await asyncio.sleep(0.05)
+        owner.cancel()
+        responses = await asyncio.wait_for(waiter, timeout=2)
+        assert owner.cancelled()
+        assert not waiter.cancelled()
+        return responses
+
+    responses = asyncio.run(run())
+    assert responses[0].json() == RESPONSE_BODY
+    assert len(calls) == 2, f"期望等待者重新发送1次, 实际上游调用{len(calls)}次"
+    print("✅ 发起方取消测试通过")
+
+
+if __name__ == "__main__":
+    test_identical_requests_share_upstream_call()
+    test_dedup_is_per_client()
+    test_owner_cancellation_does_not_cancel_waiters()
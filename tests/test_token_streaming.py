@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+测试LLM token流式转发
+验证on_token模式下逐个转发token，并且流式调用的token用量同样被记录
+"""
+
+import asyncio
+from typing import Any, List, Optional
+
+import pytest
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langgraph.graph import END, START, MessagesState, StateGraph
+
+USAGE = {"input_tokens": 12, "output_tokens": 3, "total_tokens": 15}
+
+
+class FakeStreamingModel(BaseChatModel):
+    """_generate与_stream分别记录调用，流式输出最后一块携带token用量"""
+
+    generate_calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-streaming"
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager=None, **kwargs: Any) -> ChatResult:
+        self.generate_calls += 1
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="买入观望"))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager=None, **kwargs: Any):
+        for token in ("买入", "观望"):
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=USAGE))
+
+
+def test_streamed_calls_track_usage(monkeypatch):
+    """测试on_token模式下转发token，并记录流式调用的token用量"""
+    print("🔧 测试流式token用量追踪...")
+    from tradingagents.config.config_manager import token_tracker
+    from tradingagents.graph.trading_graph import TradingAgentsGraph
+
+    tracked = []
+    monkeypatch.setattr(token_tracker, "track_usage", lambda **kwargs: tracked.append(kwargs))
+
+    model = FakeStreamingModel()
+
+    def analyst(state, config):
+        return {"messages": [model.invoke(state["messages"], config)]}
+
+    workflow = StateGraph(MessagesState)
+    workflow.add_node("Market Analyst", analyst)
+    workflow.add_edge(START, "Market Analyst")
+    workflow.add_edge("Market Analyst", END)
+
+    graph = TradingAgentsGraph.__new__(TradingAgentsGraph)
+    graph.graph = workflow.compile()
+    graph.config = {"llm_provider": "dashscope"}
+
+    tokens = []
+
+    async def on_token(token, node):
+        tokens.append((token, node))
+
+    final_state = asyncio.run(graph._astream_tokens({"messages": [("human", "分析AAPL")]}, {"config": {}}, on_token))
+
+    assert tokens == [("买入", "Market Analyst"), ("观望", "Market Analyst")], tokens
+    assert final_state["messages"][-1].content == "买入观望"
+    assert model.generate_calls == 0, "流式模式不应经过_generate"
+    assert len(tracked) == 1, f"期望记录1次token用量, 实际{len(tracked)}"
+    assert tracked[0]["provider"] == "dashscope"
+    assert (tracked[0]["input_tokens"], tracked[0]["output_tokens"]) == (12, 3)
+    print("✅ 流式token用量追踪测试通过")
+
+
+if __name__ == "__main__":
+    with pytest.MonkeyPatch.context() as mp:
+        test_streamed_calls_track_usage(mp)
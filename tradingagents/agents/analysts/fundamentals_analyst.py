@@ -217,17 +217,8 @@ def create_fundamentals_analyst(llm, toolkit):
         prompt = prompt.partial(ticker=ticker)
         prompt = prompt.partial(company_name=company_name)
 
-        # 检测阿里百炼模型并创建新实例
-        if hasattr(llm, '__class__') and 'DashScope' in llm.__class__.__name__:
-            logger.debug(f"📊 [DEBUG] 检测到阿里百炼模型，创建新实例以避免工具缓存")
-            from tradingagents.llm_adapters import ChatDashScopeOpenAI
-            fresh_llm = ChatDashScopeOpenAI(
-                model=llm.model_name,
-                temperature=llm.temperature,
-                max_tokens=getattr(llm, 'max_tokens', 2000)
-            )
-        else:
-            fresh_llm = llm
+        # bind_tools 返回新的绑定对象，不会在共享的LLM上缓存工具，因此直接使用传入的LLM
+        # （保留其降级链、准入控制与共享HTTP客户端）
 
         logger.debug(f"📊 [DEBUG] 创建LLM链，工具数量: {len(tools)}")
         # 安全地获取工具名称用于调试
@@ -243,7 +234,7 @@ def create_fundamentals_analyst(llm, toolkit):
         logger.debug(f"📊 [DEBUG] 创建工具链，让模型自主决定是否调用工具")
 
         try:
-            chain = prompt | fresh_llm.bind_tools(tools)
+            chain = prompt | llm.bind_tools(tools)
             logger.debug(f"📊 [DEBUG] ✅ 工具绑定成功，绑定了 {len(tools)} 个工具")
         except Exception as e:
             logger.error(f"📊 [DEBUG] ❌ 工具绑定失败: {e}")
@@ -269,7 +260,7 @@ def create_fundamentals_analyst(llm, toolkit):
         logger.debug(f"📊 [DEBUG] LLM调用完成")
 
         # 使用统一的Google工具调用处理器
-        if GoogleToolCallHandler.is_google_model(fresh_llm):
+        if GoogleToolCallHandler.is_google_model(llm):
             logger.info(f"📊 [基本面分析师] 检测到Google模型，使用统一工具调用处理器")
             
             # 创建分析提示词
@@ -283,7 +274,7 @@ def create_fundamentals_analyst(llm, toolkit):
             # 处理Google模型工具调用
             report, messages = GoogleToolCallHandler.handle_google_tool_calls(
                 result=result,
-                llm=fresh_llm,
+                llm=llm,
                 tools=tools,
                 state=state,
                 analysis_prompt_template=analysis_prompt_template,
@@ -293,7 +284,7 @@ def create_fundamentals_analyst(llm, toolkit):
             return {"fundamentals_report": report}
         else:
             # 非Google模型的处理逻辑
-            logger.debug(f"📊 [DEBUG] 非Google模型 ({fresh_llm.__class__.__name__})，使用标准处理逻辑")
+            logger.debug(f"📊 [DEBUG] 非Google模型 ({llm.__class__.__name__})，使用标准处理逻辑")
             
             # 检查工具调用情况
             tool_call_count = len(result.tool_calls) if hasattr(result, 'tool_calls') else 0
@@ -374,7 +365,7 @@ def create_fundamentals_analyst(llm, toolkit):
                         ("human", "{analysis_request}")
                     ])
                     
-                    analysis_chain = analysis_prompt_template | fresh_llm
+                    analysis_chain = analysis_prompt_template | llm
                     analysis_result = analysis_chain.invoke({"analysis_request": analysis_prompt})
                     
                     if hasattr(analysis_result, 'content'):
@@ -30,7 +30,12 @@ class ChromaDBManager:
         return cls._instance
 
     def __init__(self):
-        if not self._initialized:
+        if self._initialized:
+            return
+        # 多线程同时构造记忆库时，确保客户端只初始化一次
+        with self._lock:
+            if self._initialized:
+                return
             try:
                 # 自动检测操作系统版本并使用最优配置
                 import platform
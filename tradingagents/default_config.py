@@ -17,6 +17,31 @@ DEFAULT_CONFIG = {
     "max_debate_rounds": 1,
     "max_risk_discuss_rounds": 1,
     "max_recur_limit": 100,
+    # Graph execution settings - 分析师并行执行（关闭后按顺序执行）
+    "parallel_analysts": os.getenv("PARALLEL_ANALYSTS_ENABLED", "true").lower() == "true",
+    # LLM request settings - 并发的信号提取请求合并为一次调用
+    "llm_micro_batching": os.getenv("LLM_MICRO_BATCHING_ENABLED", "false").lower() == "true",
+    "llm_batch_max_size": 8,
+    "llm_batch_max_wait_ms": 20,
+    # LLM request dedup - 完全相同的并发请求只发送一次，共享同一个响应
+    "llm_request_dedup": os.getenv("LLM_REQUEST_DEDUP_ENABLED", "false").lower() == "true",
+    # LLM admission control - 限制单个图实例并发的LLM调用数与每分钟预估token数
+    "llm_admission_control": os.getenv("LLM_ADMISSION_CONTROL_ENABLED", "false").lower() == "true",
+    "max_inflight_llm": 16,
+    "llm_tokens_per_minute": 30000,
+    # LLM backend mode - realtime 实时调用；batch 通过OpenAI Batch API提交（适合离线回测，延迟高、成本低）
+    "backend_mode": os.getenv("LLM_BACKEND_MODE", "realtime"),
+    "batch_collect_window": 5.0,  # 汇总请求的时间窗口（秒）
+    "batch_poll_interval": 30.0,  # 轮询任务状态的间隔（秒）
+    "batch_timeout": 25 * 3600,  # 任务最长等待时间（秒），超时后取消任务
+    # LLM cache settings - 按提示哈希缓存LLM响应，重复回测时跳过相同的调用
+    "llm_cache": os.getenv("LLM_CACHE_ENABLED", "false").lower() == "true",
+    "llm_cache_path": os.path.join(os.path.expanduser("~"), ".tradingagents", "llm_cache.sqlite"),
+    # LLM fallback settings - 主提供商熔断后降级到其他已配置密钥的提供商
+    "llm_fallback": os.getenv("LLM_FALLBACK_ENABLED", "false").lower() == "true",
+    "llm_fallback_providers": ["dashscope", "deepseek", "openai", "google"],
+    "llm_circuit_failure_threshold": 5,
+    "llm_circuit_cooldown": 30,
     # Tool settings - 从环境变量读取，提供默认值
     "online_tools": os.getenv("ONLINE_TOOLS_ENABLED", "false").lower() == "true",
     "online_news": os.getenv("ONLINE_NEWS_ENABLED", "true").lower() == "true", 
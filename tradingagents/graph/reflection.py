@@ -1,7 +1,9 @@
 # TradingAgents/graph/reflection.py
 
-from typing import Dict, Any
-from langchain_openai import ChatOpenAI
+from typing import TYPE_CHECKING, Dict, Any
+
+if TYPE_CHECKING:
+    from langchain_openai import ChatOpenAI
 
 # 导入统一日志系统
 from tradingagents.utils.logging_init import get_logger
@@ -11,7 +13,7 @@ logger = get_logger("default")
 class Reflector:
     """Handles reflection on decisions and updating memory."""
 
-    def __init__(self, quick_thinking_llm: ChatOpenAI):
+    def __init__(self, quick_thinking_llm: "ChatOpenAI"):
         """Initialize the reflector with an LLM."""
         self.quick_thinking_llm = quick_thinking_llm
         self.reflection_system_prompt = self._get_reflection_prompt()
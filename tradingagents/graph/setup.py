@@ -1,29 +1,39 @@
 # TradingAgents/graph/setup.py
 
-from typing import Dict, Any
-from langchain_openai import ChatOpenAI
+from typing import TYPE_CHECKING, Dict, Any
+from langchain_core.runnables import RunnableConfig, RunnableLambda
 from langgraph.graph import END, StateGraph, START
 from langgraph.prebuilt import ToolNode
 
-from tradingagents.agents import *
 from tradingagents.agents.utils.agent_states import AgentState
-from tradingagents.agents.utils.agent_utils import Toolkit
 
 from .conditional_logic import ConditionalLogic
 
+if TYPE_CHECKING:
+    from langchain_openai import ChatOpenAI
+    from tradingagents.agents.utils.agent_utils import Toolkit
+
 # 导入统一日志系统
 from tradingagents.utils.logging_init import get_logger
 logger = get_logger("default")
 
+# 各分析师写入的报告字段
+ANALYST_REPORT_KEYS = {
+    "market": "market_report",
+    "social": "sentiment_report",
+    "news": "news_report",
+    "fundamentals": "fundamentals_report",
+}
+
 
 class GraphSetup:
     """Handles the setup and configuration of the agent graph."""
 
     def __init__(
         self,
-        quick_thinking_llm: ChatOpenAI,
-        deep_thinking_llm: ChatOpenAI,
-        toolkit: Toolkit,
+        quick_thinking_llm: "ChatOpenAI",
+        deep_thinking_llm: "ChatOpenAI",
+        toolkit: "Toolkit",
         tool_nodes: Dict[str, ToolNode],
         bull_memory,
         bear_memory,
@@ -63,6 +73,23 @@ class GraphSetup:
         if len(selected_analysts) == 0:
             raise ValueError("Trading Agents Graph Setup Error: no analysts selected!")
 
+        # 分析师及其数据源依赖较重，仅在构建图时导入
+        from tradingagents.agents import (
+            create_bear_researcher,
+            create_bull_researcher,
+            create_fundamentals_analyst,
+            create_market_analyst,
+            create_msg_delete,
+            create_neutral_debator,
+            create_news_analyst,
+            create_research_manager,
+            create_risk_manager,
+            create_risky_debator,
+            create_safe_debator,
+            create_social_media_analyst,
+            create_trader,
+        )
+
         # Create analyst nodes
         analyst_nodes = {}
         delete_nodes = {}
@@ -159,13 +186,27 @@ class GraphSetup:
         # Create workflow
         workflow = StateGraph(AgentState)
 
+        # 并行模式下分析师彼此独立地扇出执行，全部完成后汇合到Bull Researcher
+        parallel_analysts = self.config.get("parallel_analysts", True)
+
         # Add analyst nodes to the graph
         for analyst_type, node in analyst_nodes.items():
-            workflow.add_node(f"{analyst_type.capitalize()} Analyst", node)
-            workflow.add_node(
-                f"Msg Clear {analyst_type.capitalize()}", delete_nodes[analyst_type]
-            )
-            workflow.add_node(f"tools_{analyst_type}", tool_nodes[analyst_type])
+            if parallel_analysts:
+                workflow.add_node(
+                    f"{analyst_type.capitalize()} Analyst",
+                    self._create_analyst_branch(
+                        analyst_type,
+                        node,
+                        delete_nodes[analyst_type],
+                        tool_nodes[analyst_type],
+                    ),
+                )
+            else:
+                workflow.add_node(f"{analyst_type.capitalize()} Analyst", node)
+                workflow.add_node(
+                    f"Msg Clear {analyst_type.capitalize()}", delete_nodes[analyst_type]
+                )
+                workflow.add_node(f"tools_{analyst_type}", tool_nodes[analyst_type])
 
         # Add other nodes
         workflow.add_node("Bull Researcher", bull_researcher_node)
@@ -178,30 +219,39 @@ class GraphSetup:
         workflow.add_node("Risk Judge", risk_manager_node)
 
         # Define edges
-        # Start with the first analyst
-        first_analyst = selected_analysts[0]
-        workflow.add_edge(START, f"{first_analyst.capitalize()} Analyst")
-
-        # Connect analysts in sequence
-        for i, analyst_type in enumerate(selected_analysts):
-            current_analyst = f"{analyst_type.capitalize()} Analyst"
-            current_tools = f"tools_{analyst_type}"
-            current_clear = f"Msg Clear {analyst_type.capitalize()}"
-
-            # Add conditional edges for current analyst
-            workflow.add_conditional_edges(
-                current_analyst,
-                getattr(self.conditional_logic, f"should_continue_{analyst_type}"),
-                [current_tools, current_clear],
+        if parallel_analysts:
+            # Fan out from START to every analyst and join before the debate
+            for analyst_type in selected_analysts:
+                workflow.add_edge(START, f"{analyst_type.capitalize()} Analyst")
+            workflow.add_edge(
+                [f"{analyst_type.capitalize()} Analyst" for analyst_type in selected_analysts],
+                "Bull Researcher",
             )
-            workflow.add_edge(current_tools, current_analyst)
-
-            # Connect to next analyst or to Bull Researcher if this is the last analyst
-            if i < len(selected_analysts) - 1:
-                next_analyst = f"{selected_analysts[i+1].capitalize()} Analyst"
-                workflow.add_edge(current_clear, next_analyst)
-            else:
-                workflow.add_edge(current_clear, "Bull Researcher")
+        else:
+            # Start with the first analyst
+            first_analyst = selected_analysts[0]
+            workflow.add_edge(START, f"{first_analyst.capitalize()} Analyst")
+
+            # Connect analysts in sequence
+            for i, analyst_type in enumerate(selected_analysts):
+                current_analyst = f"{analyst_type.capitalize()} Analyst"
+                current_tools = f"tools_{analyst_type}"
+                current_clear = f"Msg Clear {analyst_type.capitalize()}"
+
+                # Add conditional edges for current analyst
+                workflow.add_conditional_edges(
+                    current_analyst,
+                    getattr(self.conditional_logic, f"should_continue_{analyst_type}"),
+                    [current_tools, current_clear],
+                )
+                workflow.add_edge(current_tools, current_analyst)
+
+                # Connect to next analyst or to Bull Researcher if this is the last analyst
+                if i < len(selected_analysts) - 1:
+                    next_analyst = f"{selected_analysts[i+1].capitalize()} Analyst"
+                    workflow.add_edge(current_clear, next_analyst)
+                else:
+                    workflow.add_edge(current_clear, "Bull Researcher")
 
         # Add remaining edges
         workflow.add_conditional_edges(
@@ -251,3 +301,41 @@ class GraphSetup:
 
         # Compile and return
         return workflow.compile()
+
+    def _create_analyst_branch(self, analyst_type, analyst_node, delete_node, tool_node):
+        """Wrap an analyst's tool loop in a subgraph with its own message history.
+
+        Analysts share the ``messages`` channel, so running them side by side in
+        the parent graph would interleave their tool calls. Each branch instead
+        runs its loop privately and only hands its report back to the parent.
+        """
+        name = analyst_type.capitalize()
+        analyst = f"{name} Analyst"
+        tools = f"tools_{analyst_type}"
+        clear = f"Msg Clear {name}"
+
+        branch = StateGraph(AgentState)
+        branch.add_node(analyst, analyst_node)
+        branch.add_node(tools, tool_node)
+        branch.add_node(clear, delete_node)
+        branch.add_edge(START, analyst)
+        branch.add_conditional_edges(
+            analyst,
+            getattr(self.conditional_logic, f"should_continue_{analyst_type}"),
+            [tools, clear],
+        )
+        branch.add_edge(tools, analyst)
+        branch.add_edge(clear, END)
+        compiled_branch = branch.compile()
+
+        report_key = ANALYST_REPORT_KEYS[analyst_type]
+
+        def run_branch(state, config: RunnableConfig):
+            result = compiled_branch.invoke(state, config)
+            return {report_key: result.get(report_key, "")}
+
+        async def arun_branch(state, config: RunnableConfig):
+            result = await compiled_branch.ainvoke(state, config)
+            return {report_key: result.get(report_key, "")}
+
+        return RunnableLambda(run_branch, afunc=arun_branch, name=analyst)
@@ -1,34 +1,34 @@
 # TradingAgents/graph/trading_graph.py
 
 import os
+import asyncio
+import functools
+import importlib
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import json
+from collections import OrderedDict
 from datetime import date
 from typing import Dict, Any, Tuple, List, Optional
 
-from langchain_openai import ChatOpenAI
-from langchain_anthropic import ChatAnthropic
-from langchain_google_genai import ChatGoogleGenerativeAI
-from tradingagents.llm_adapters import ChatDashScope, ChatDashScopeOpenAI, ChatGoogleOpenAI
+try:
+    import orjson
+except ImportError:  # 未安装orjson时退回标准库json
+    orjson = None
+
+from tradingagents.llm_adapters.admission import AdmissionControlledLLM, Bulkhead
+from tradingagents.llm_adapters.batching import with_micro_batching
+from tradingagents.llm_adapters.fallback import FallbackLLM
+from tradingagents.llm_adapters.http_clients import get_openai_http_kwargs
+from tradingagents.llm_adapters.llm_cache import get_llm_cache
 
 from langgraph.prebuilt import ToolNode
 
-from tradingagents.agents import *
 from tradingagents.default_config import DEFAULT_CONFIG
-from tradingagents.agents.utils.memory import FinancialSituationMemory
-
-# 导入统一日志系统
-from tradingagents.utils.logging_init import get_logger
 
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
 logger = get_logger('agents')
-from tradingagents.agents.utils.agent_states import (
-    AgentState,
-    InvestDebateState,
-    RiskDebateState,
-)
-from tradingagents.dataflows.interface import set_config
 
 from .conditional_logic import ConditionalLogic
 from .setup import GraphSetup
@@ -37,6 +37,260 @@ from .reflection import Reflector
 from .signal_processing import SignalProcessor
 
 
+def _import_attr(module_name, attr):
+    """Import a provider SDK attribute on first use.
+
+    Most runs use a single provider, so the other SDKs are never loaded.
+    """
+    return getattr(importlib.import_module(module_name), attr)
+
+
+def _load_agents():
+    """Import the agent components used by TradingAgentsGraph on first construction."""
+    from tradingagents.agents import FinancialSituationMemory, Toolkit
+    from tradingagents.dataflows.interface import set_config
+    return Toolkit, FinancialSituationMemory, set_config
+
+
+def _create_openai(request_dedup=False, **kwargs):
+    ChatOpenAI = _import_attr("langchain_openai", "ChatOpenAI")
+    return ChatOpenAI(**kwargs, stream_usage=True, **get_openai_http_kwargs(request_dedup))
+
+
+def _create_openai_batch(batch_options=(), request_dedup=False, **kwargs):
+    # 同步请求走Batch API，异步请求仍使用共享的实时客户端
+    # 关闭SDK重试：批处理任务失败时重试会重新提交整个任务（每个任务最长可运行24小时）
+    ChatOpenAI = _import_attr("langchain_openai", "ChatOpenAI")
+    get_batch_http_client = _import_attr("tradingagents.llm_adapters.batch_api", "get_batch_http_client")
+    return ChatOpenAI(
+        **kwargs,
+        max_retries=0,
+        http_client=get_batch_http_client(*batch_options),
+        http_async_client=get_openai_http_kwargs(request_dedup)["http_async_client"],
+    )
+
+
+def _create_anthropic(**kwargs):
+    ChatAnthropic = _import_attr("langchain_anthropic", "ChatAnthropic")
+    return ChatAnthropic(**kwargs)
+
+
+def _create_google(api_key=None, **kwargs):
+    ChatGoogleOpenAI = _import_attr("tradingagents.llm_adapters.google_openai_adapter", "ChatGoogleOpenAI")
+    return ChatGoogleOpenAI(google_api_key=api_key, **kwargs)
+
+
+def _create_dashscope(request_dedup=False, **kwargs):
+    ChatDashScopeOpenAI = _import_attr("tradingagents.llm_adapters.dashscope_openai_adapter", "ChatDashScopeOpenAI")
+    return ChatDashScopeOpenAI(**kwargs, stream_usage=True, **get_openai_http_kwargs(request_dedup))
+
+
+def _create_deepseek(request_dedup=False, **kwargs):
+    ChatDeepSeek = _import_attr("tradingagents.llm_adapters.deepseek_adapter", "ChatDeepSeek")
+    return ChatDeepSeek(**kwargs, stream_usage=True, **get_openai_http_kwargs(request_dedup))
+
+
+def _openai_compatible_creator(provider):
+    def create(request_dedup=False, **kwargs):
+        create_openai_compatible_llm = _import_attr(
+            "tradingagents.llm_adapters.openai_compatible_base", "create_openai_compatible_llm"
+        )
+        return create_openai_compatible_llm(
+            provider=provider, **kwargs, stream_usage=True, **get_openai_http_kwargs(request_dedup)
+        )
+    return create
+
+
+# 各提供商对应的LLM构造函数
+_LLM_CREATORS = {
+    "openai": _create_openai,
+    "openai_batch": _create_openai_batch,
+    "siliconflow": _create_openai,
+    "openrouter": _create_openai,
+    "ollama": _create_openai,
+    "anthropic": _create_anthropic,
+    "google": _create_google,
+    "dashscope": _create_dashscope,
+    "deepseek": _create_deepseek,
+    "custom_openai": _openai_compatible_creator("custom_openai"),
+    "qianfan": _openai_compatible_creator("qianfan"),
+}
+
+
+# 使用共享HTTP客户端（支持在途请求去重）的提供商
+_SHARED_HTTP_PROVIDERS = {
+    "openai", "openai_batch", "siliconflow", "openrouter", "ollama",
+    "dashscope", "deepseek", "custom_openai", "qianfan",
+}
+
+
+# 提供商别名，统一映射到 PROVIDERS 中的名称
+_PROVIDER_ALIASES = {
+    "alibaba": "dashscope",
+    "阿里百炼": "dashscope",
+}
+
+# 兼容提供商名称中包含关键字的写法（如 "dashscope-qwen"）
+_PROVIDER_KEYWORDS = {
+    "dashscope": "dashscope",
+    "阿里百炼": "dashscope",
+    "deepseek": "deepseek",
+}
+
+# 大多数提供商共用的生成参数
+_LLM_DEFAULTS = {"temperature": 0.1, "max_tokens": 2000}
+
+# 支持 backend_mode="batch" 的提供商
+_BATCH_CAPABLE_PROVIDERS = {"openai"}
+
+# 降级链可用的提供商：(API密钥环境变量, 深度思考模型, 快速思考模型, 额外参数)
+_FALLBACK_MODELS = {
+    "dashscope": ("DASHSCOPE_API_KEY", "qwen-plus-latest", "qwen-turbo", {}),
+    "deepseek": ("DEEPSEEK_API_KEY", "deepseek-chat", "deepseek-chat", {}),
+    "openai": ("OPENAI_API_KEY", "gpt-4o", "gpt-4o-mini", {"base_url": "https://api.openai.com/v1"}),
+    "google": ("GOOGLE_API_KEY", "gemini-2.5-pro", "gemini-2.5-flash", {}),
+}
+
+# 内存中保留的最近状态条数，完整历史见 full_states_log.jsonl
+_MAX_LOGGED_STATES = 32
+
+# 各智能体的记忆库名称
+_MEMORY_NAMES = (
+    "bull_memory",
+    "bear_memory",
+    "trader_memory",
+    "invest_judge_memory",
+    "risk_manager_memory",
+)
+
+
+def _normalize_provider(name):
+    """Map a configured llm_provider value onto a PROVIDERS key."""
+    provider = name.lower().strip()
+    provider = _PROVIDER_ALIASES.get(provider, provider)
+    if provider in _LLM_CREATORS:
+        return provider
+    for keyword, target in _PROVIDER_KEYWORDS.items():
+        if keyword in provider:
+            return target
+    return provider
+
+
+@functools.lru_cache(maxsize=32)
+def _get_llm(provider, model, base_url=None, api_key=None, temperature=None, max_tokens=None, cache_path=None,
+             batch_options=None, request_dedup=False):
+    """Return a shared LLM client for the given provider and model settings.
+
+    Clients are cached so that repeatedly constructing TradingAgentsGraph
+    (e.g. once per ticker/date in a backtest) reuses the same instances and
+    their connection pools. Unset arguments fall back to the adapter defaults.
+    When ``cache_path`` is given, the client reads and writes that SQLite
+    response cache; other clients in the process are unaffected.
+    ``batch_options`` is the (collect_window, poll_interval, timeout) tuple
+    for the Batch API backend. ``request_dedup`` selects the shared HTTP
+    client that collapses identical in-flight requests; it is part of the
+    cache key, so graphs with and without dedup never share a client.
+    """
+    kwargs = {
+        "model": model,
+        "base_url": base_url,
+        "api_key": api_key,
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+    }
+    kwargs = {key: value for key, value in kwargs.items() if value is not None}
+    if cache_path is not None:
+        kwargs["cache"] = get_llm_cache(cache_path)
+    if batch_options is not None:
+        kwargs["batch_options"] = batch_options
+    if request_dedup and provider in _SHARED_HTTP_PROVIDERS:
+        kwargs["request_dedup"] = True
+    return _LLM_CREATORS[provider](**kwargs)
+
+
+@functools.lru_cache(maxsize=None)
+def _build_tool_nodes(toolkit_cls) -> Dict[str, ToolNode]:
+    """Build the analyst tool nodes once per Toolkit class.
+
+    Toolkit's tools are static ``@tool`` objects, so the nodes do not depend on
+    a Toolkit instance and can be shared by every graph.
+    """
+    return {
+        "market": ToolNode(
+            [
+                # 统一工具
+                toolkit_cls.get_stock_market_data_unified,
+                # online tools
+                toolkit_cls.get_YFin_data_online,
+                toolkit_cls.get_stockstats_indicators_report_online,
+                # offline tools
+                toolkit_cls.get_YFin_data,
+                toolkit_cls.get_stockstats_indicators_report,
+            ]
+        ),
+        "social": ToolNode(
+            [
+                # online tools
+                toolkit_cls.get_stock_news_openai,
+                # offline tools
+                toolkit_cls.get_reddit_stock_info,
+            ]
+        ),
+        "news": ToolNode(
+            [
+                # online tools
+                toolkit_cls.get_global_news_openai,
+                toolkit_cls.get_google_news,
+                # offline tools
+                toolkit_cls.get_finnhub_news,
+                toolkit_cls.get_reddit_news,
+            ]
+        ),
+        "fundamentals": ToolNode(
+            [
+                # 统一工具
+                toolkit_cls.get_stock_fundamentals_unified,
+                # offline tools
+                toolkit_cls.get_finnhub_company_insider_sentiment,
+                toolkit_cls.get_finnhub_company_insider_transactions,
+                toolkit_cls.get_simfin_balance_sheet,
+                toolkit_cls.get_simfin_cashflow,
+                toolkit_cls.get_simfin_income_stmt,
+            ]
+        ),
+    }
+
+
+def _dumps_state_line(entry: Dict[str, Any]) -> bytes:
+    """Serialize one logged state as a UTF-8 JSON Lines record."""
+    if orjson is not None:
+        return orjson.dumps(entry, option=orjson.OPT_APPEND_NEWLINE)
+    return (json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+def _chunk_text(chunk) -> str:
+    """Extract the text of a streamed message chunk."""
+    content = chunk.content
+    if isinstance(content, str):
+        return content
+    # 部分模型（如Anthropic）以内容块列表的形式返回
+    return "".join(
+        block.get("text", "") for block in content if isinstance(block, dict)
+    )
+
+
+def _run_coroutine_sync(coro):
+    """Run a coroutine to completion from synchronous code."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+
+    # 调用方已处于事件循环中（如Chainlit回调），在独立线程中运行以避免嵌套事件循环
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coro).result()
+
+
 class TradingAgentsGraph:
     """Main class that orchestrates the trading agents framework."""
 
@@ -56,6 +310,8 @@ class TradingAgentsGraph:
         self.debug = debug
         self.config = config or DEFAULT_CONFIG
 
+        Toolkit, FinancialSituationMemory, set_config = _load_agents()
+
         # Update the interface's config
         set_config(self.config)
 
@@ -66,184 +322,39 @@ class TradingAgentsGraph:
         )
 
         # Initialize LLMs
-        if self.config["llm_provider"].lower() == "openai":
-            self.deep_thinking_llm = ChatOpenAI(model=self.config["deep_think_llm"], base_url=self.config["backend_url"])
-            self.quick_thinking_llm = ChatOpenAI(model=self.config["quick_think_llm"], base_url=self.config["backend_url"])
-        elif self.config["llm_provider"] == "siliconflow":
-            # SiliconFlow支持：使用OpenAI兼容API
-            siliconflow_api_key = os.getenv('SILICONFLOW_API_KEY')
-            if not siliconflow_api_key:
-                raise ValueError("使用SiliconFlow需要设置SILICONFLOW_API_KEY环境变量")
-
-            logger.info(f"🌐 [SiliconFlow] 使用API密钥: {siliconflow_api_key[:20]}...")
-
-            self.deep_thinking_llm = ChatOpenAI(
-                model=self.config["deep_think_llm"],
-                base_url=self.config["backend_url"],
-                api_key=siliconflow_api_key,
-                temperature=0.1,
-                max_tokens=2000
-            )
-            self.quick_thinking_llm = ChatOpenAI(
-                model=self.config["quick_think_llm"],
-                base_url=self.config["backend_url"],
-                api_key=siliconflow_api_key,
-                temperature=0.1,
-                max_tokens=2000
-            )
-        elif self.config["llm_provider"] == "openrouter":
-            # OpenRouter支持：优先使用OPENROUTER_API_KEY，否则使用OPENAI_API_KEY
-            openrouter_api_key = os.getenv('OPENROUTER_API_KEY') or os.getenv('OPENAI_API_KEY')
-            if not openrouter_api_key:
-                raise ValueError("使用OpenRouter需要设置OPENROUTER_API_KEY或OPENAI_API_KEY环境变量")
-
-            logger.info(f"🌐 [OpenRouter] 使用API密钥: {openrouter_api_key[:20]}...")
-
-            self.deep_thinking_llm = ChatOpenAI(
-                model=self.config["deep_think_llm"],
-                base_url=self.config["backend_url"],
-                api_key=openrouter_api_key
-            )
-            self.quick_thinking_llm = ChatOpenAI(
-                model=self.config["quick_think_llm"],
-                base_url=self.config["backend_url"],
-                api_key=openrouter_api_key
-            )
-        elif self.config["llm_provider"] == "ollama":
-            self.deep_thinking_llm = ChatOpenAI(model=self.config["deep_think_llm"], base_url=self.config["backend_url"])
-            self.quick_thinking_llm = ChatOpenAI(model=self.config["quick_think_llm"], base_url=self.config["backend_url"])
-        elif self.config["llm_provider"].lower() == "anthropic":
-            self.deep_thinking_llm = ChatAnthropic(model=self.config["deep_think_llm"], base_url=self.config["backend_url"])
-            self.quick_thinking_llm = ChatAnthropic(model=self.config["quick_think_llm"], base_url=self.config["backend_url"])
-        elif self.config["llm_provider"].lower() == "google":
-            # 使用 Google OpenAI 兼容适配器，解决工具调用格式不匹配问题
-            logger.info(f"🔧 使用Google AI OpenAI 兼容适配器 (解决工具调用问题)")
-            google_api_key = os.getenv('GOOGLE_API_KEY')
-            if not google_api_key:
-                raise ValueError("使用Google AI需要设置GOOGLE_API_KEY环境变量")
-            
-            self.deep_thinking_llm = ChatGoogleOpenAI(
-                model=self.config["deep_think_llm"],
-                google_api_key=google_api_key,
-                temperature=0.1,
-                max_tokens=2000
-            )
-            self.quick_thinking_llm = ChatGoogleOpenAI(
-                model=self.config["quick_think_llm"],
-                google_api_key=google_api_key,
-                temperature=0.1,
-                max_tokens=2000,
-                client_options=client_options,
-                transport="rest"
-            )
-            
-            logger.info(f"✅ [Google AI] 已启用优化的工具调用和内容格式处理")
-        elif (self.config["llm_provider"].lower() == "dashscope" or
-              self.config["llm_provider"].lower() == "alibaba" or
-              "dashscope" in self.config["llm_provider"].lower() or
-              "阿里百炼" in self.config["llm_provider"]):
-            # 使用 OpenAI 兼容适配器，支持原生 Function Calling
-            logger.info(f"🔧 使用阿里百炼 OpenAI 兼容适配器 (支持原生工具调用)")
-            self.deep_thinking_llm = ChatDashScopeOpenAI(
-                model=self.config["deep_think_llm"],
-                temperature=0.1,
-                max_tokens=2000
+        provider = _normalize_provider(self.config["llm_provider"])
+        if provider not in self.PROVIDERS:
+            raise ValueError(f"Unsupported LLM provider: {self.config['llm_provider']}")
+        if self.config.get("backend_mode", "realtime") == "batch" and provider not in _BATCH_CAPABLE_PROVIDERS:
+            logger.warning(f"⚠️ {provider} 不支持Batch API后端，使用实时调用")
+        self.deep_thinking_llm, self.quick_thinking_llm = self.PROVIDERS[provider](self, self.config)
+        if self.config.get("llm_fallback", False):
+            self.deep_thinking_llm, self.quick_thinking_llm = self._with_fallbacks(
+                provider, self.deep_thinking_llm, self.quick_thinking_llm
             )
-            self.quick_thinking_llm = ChatDashScopeOpenAI(
-                model=self.config["quick_think_llm"],
-                temperature=0.1,
-                max_tokens=2000
+        if self.config.get("llm_admission_control", False):
+            # 深度/快速思考模型共享同一舱壁，限制本图实例的总并发与token速率
+            self._bulkhead = Bulkhead(
+                max_inflight=self.config.get("max_inflight_llm", 16),
+                tokens_per_minute=self.config.get("llm_tokens_per_minute", 30000),
             )
-        elif (self.config["llm_provider"].lower() == "deepseek" or
-              "deepseek" in self.config["llm_provider"].lower()):
-            # DeepSeek V3配置 - 使用支持token统计的适配器
-            from tradingagents.llm_adapters.deepseek_adapter import ChatDeepSeek
-
-
-            deepseek_api_key = os.getenv('DEEPSEEK_API_KEY')
-            if not deepseek_api_key:
-                raise ValueError("使用DeepSeek需要设置DEEPSEEK_API_KEY环境变量")
+            self.deep_thinking_llm = AdmissionControlledLLM(self.deep_thinking_llm, self._bulkhead)
+            self.quick_thinking_llm = AdmissionControlledLLM(self.quick_thinking_llm, self._bulkhead)
 
-            deepseek_base_url = os.getenv('DEEPSEEK_BASE_URL', 'https://api.deepseek.com')
-
-            # 使用支持token统计的DeepSeek适配器
-            self.deep_thinking_llm = ChatDeepSeek(
-                model=self.config["deep_think_llm"],
-                api_key=deepseek_api_key,
-                base_url=deepseek_base_url,
-                temperature=0.1,
-                max_tokens=2000
-            )
-            self.quick_thinking_llm = ChatDeepSeek(
-                model=self.config["quick_think_llm"],
-                api_key=deepseek_api_key,
-                base_url=deepseek_base_url,
-                temperature=0.1,
-                max_tokens=2000
-                )
-
-            logger.info(f"✅ [DeepSeek] 已启用token统计功能")
-        elif self.config["llm_provider"].lower() == "custom_openai":
-            # 自定义OpenAI端点配置
-            from tradingagents.llm_adapters.openai_compatible_base import create_openai_compatible_llm
-            
-            custom_api_key = os.getenv('CUSTOM_OPENAI_API_KEY')
-            if not custom_api_key:
-                raise ValueError("使用自定义OpenAI端点需要设置CUSTOM_OPENAI_API_KEY环境变量")
-            
-            custom_base_url = self.config.get("custom_openai_base_url", "https://api.openai.com/v1")
-            
-            logger.info(f"🔧 [自定义OpenAI] 使用端点: {custom_base_url}")
-            
-            # 使用OpenAI兼容适配器创建LLM实例
-            self.deep_thinking_llm = create_openai_compatible_llm(
-                provider="custom_openai",
-                model=self.config["deep_think_llm"],
-                base_url=custom_base_url,
-                temperature=0.1,
-                max_tokens=2000
-            )
-            self.quick_thinking_llm = create_openai_compatible_llm(
-                provider="custom_openai",
-                model=self.config["quick_think_llm"],
-                base_url=custom_base_url,
-                temperature=0.1,
-                max_tokens=2000
-            )
-            
-            logger.info(f"✅ [自定义OpenAI] 已配置自定义端点: {custom_base_url}")
-        elif self.config["llm_provider"].lower() == "qianfan":
-            # 百度千帆（文心一言）配置 - 统一由适配器内部读取与校验 QIANFAN_API_KEY
-            from tradingagents.llm_adapters.openai_compatible_base import create_openai_compatible_llm
-            
-            # 使用OpenAI兼容适配器创建LLM实例（基类会使用千帆默认base_url并负责密钥校验）
-            self.deep_thinking_llm = create_openai_compatible_llm(
-                provider="qianfan",
-                model=self.config["deep_think_llm"],
-                temperature=0.1,
-                max_tokens=2000
-            )
-            self.quick_thinking_llm = create_openai_compatible_llm(
-                provider="qianfan",
-                model=self.config["quick_think_llm"],
-                temperature=0.1,
-                max_tokens=2000
-            )
-            logger.info("✅ [千帆] 文心一言适配器已配置成功")
-        else:
-            raise ValueError(f"Unsupported LLM provider: {self.config['llm_provider']}")
-        
         self.toolkit = Toolkit(config=self.config)
 
         # Initialize memories (如果启用)
         memory_enabled = self.config.get("memory_enabled", True)
         if memory_enabled:
-            # 使用单例ChromaDB管理器，避免并发创建冲突
-            self.bull_memory = FinancialSituationMemory("bull_memory", self.config)
-            self.bear_memory = FinancialSituationMemory("bear_memory", self.config)
-            self.trader_memory = FinancialSituationMemory("trader_memory", self.config)
-            self.invest_judge_memory = FinancialSituationMemory("invest_judge_memory", self.config)
-            self.risk_manager_memory = FinancialSituationMemory("risk_manager_memory", self.config)
+            # 并发初始化各记忆库；单例ChromaDB管理器保证集合的创建是线程安全的
+            with ThreadPoolExecutor(max_workers=len(_MEMORY_NAMES)) as executor:
+                (
+                    self.bull_memory,
+                    self.bear_memory,
+                    self.trader_memory,
+                    self.invest_judge_memory,
+                    self.risk_manager_memory,
+                ) = executor.map(lambda name: FinancialSituationMemory(name, self.config), _MEMORY_NAMES)
         else:
             # 创建空的内存对象
             self.bull_memory = None
@@ -274,110 +385,297 @@ class TradingAgentsGraph:
 
         self.propagator = Propagator()
         self.reflector = Reflector(self.quick_thinking_llm)
-        self.signal_processor = SignalProcessor(self.quick_thinking_llm)
+
+        # 信号提取是不绑定工具的纯文本调用，可与其他图实例的并发请求合并
+        signal_llm = self.quick_thinking_llm
+        if self.config.get("llm_micro_batching", False):
+            signal_llm = with_micro_batching(
+                self.quick_thinking_llm,
+                max_batch=self.config.get("llm_batch_max_size", 8),
+                max_wait_ms=self.config.get("llm_batch_max_wait_ms", 20),
+            )
+        self.signal_processor = SignalProcessor(signal_llm)
 
         # State tracking
         self.curr_state = None
         self.ticker = None
-        self.log_states_dict = {}  # date to full state dict
+        self.log_states_dict = OrderedDict()  # date to full state dict (latest entries only)
 
         # Set up the graph
         self.graph = self.graph_setup.setup_graph(selected_analysts)
 
+    def _build_llm_pair(self, provider, cfg, **kwargs):
+        """Create the (deep_thinking_llm, quick_thinking_llm) pair for a provider."""
+        cache_path = self._llm_cache_path(cfg)
+        request_dedup = cfg.get("llm_request_dedup", False)
+        return (
+            _get_llm(provider, cfg["deep_think_llm"], cache_path=cache_path, request_dedup=request_dedup, **kwargs),
+            _get_llm(provider, cfg["quick_think_llm"], cache_path=cache_path, request_dedup=request_dedup, **kwargs),
+        )
+
+    @staticmethod
+    def _llm_cache_path(cfg):
+        """Return the response cache path when llm_cache is enabled, otherwise None."""
+        # 缓存按模型实例挂载，只作用于本配置创建的LLM
+        return cfg["llm_cache_path"] if cfg.get("llm_cache", False) else None
+
+    def _build_openai(self, cfg):
+        # 显式传入密钥，使其成为客户端缓存键的一部分；运行时更换密钥会创建新的客户端
+        openai_api_key = os.getenv('OPENAI_API_KEY')
+        if cfg.get("backend_mode", "realtime") == "batch":
+            logger.info("📦 [OpenAI] 使用Batch API后端，请求将汇总为批处理任务提交")
+            batch_options = (
+                cfg.get("batch_collect_window", 5.0),
+                cfg.get("batch_poll_interval", 30.0),
+                cfg.get("batch_timeout", 25 * 3600),
+            )
+            return self._build_llm_pair(
+                "openai_batch", cfg, base_url=cfg["backend_url"], api_key=openai_api_key, batch_options=batch_options
+            )
+        return self._build_llm_pair("openai", cfg, base_url=cfg["backend_url"], api_key=openai_api_key)
+
+    def _build_siliconflow(self, cfg):
+        # SiliconFlow支持：使用OpenAI兼容API
+        siliconflow_api_key = os.getenv('SILICONFLOW_API_KEY')
+        if not siliconflow_api_key:
+            raise ValueError("使用SiliconFlow需要设置SILICONFLOW_API_KEY环境变量")
+
+        logger.info(f"🌐 [SiliconFlow] 使用API密钥: {siliconflow_api_key[:20]}...")
+        return self._build_llm_pair(
+            "siliconflow", cfg, base_url=cfg["backend_url"], api_key=siliconflow_api_key, **_LLM_DEFAULTS
+        )
+
+    def _build_openrouter(self, cfg):
+        # OpenRouter支持：优先使用OPENROUTER_API_KEY，否则使用OPENAI_API_KEY
+        openrouter_api_key = os.getenv('OPENROUTER_API_KEY') or os.getenv('OPENAI_API_KEY')
+        if not openrouter_api_key:
+            raise ValueError("使用OpenRouter需要设置OPENROUTER_API_KEY或OPENAI_API_KEY环境变量")
+
+        logger.info(f"🌐 [OpenRouter] 使用API密钥: {openrouter_api_key[:20]}...")
+        return self._build_llm_pair("openrouter", cfg, base_url=cfg["backend_url"], api_key=openrouter_api_key)
+
+    def _build_ollama(self, cfg):
+        return self._build_llm_pair("ollama", cfg, base_url=cfg["backend_url"], api_key=os.getenv('OPENAI_API_KEY'))
+
+    def _build_anthropic(self, cfg):
+        return self._build_llm_pair(
+            "anthropic", cfg, base_url=cfg["backend_url"], api_key=os.getenv('ANTHROPIC_API_KEY')
+        )
+
+    def _build_google(self, cfg):
+        # 使用 Google OpenAI 兼容适配器，解决工具调用格式不匹配问题
+        logger.info(f"🔧 使用Google AI OpenAI 兼容适配器 (解决工具调用问题)")
+        google_api_key = os.getenv('GOOGLE_API_KEY')
+        if not google_api_key:
+            raise ValueError("使用Google AI需要设置GOOGLE_API_KEY环境变量")
+
+        llms = self._build_llm_pair("google", cfg, api_key=google_api_key, **_LLM_DEFAULTS)
+        logger.info(f"✅ [Google AI] 已启用优化的工具调用和内容格式处理")
+        return llms
+
+    def _build_dashscope(self, cfg):
+        # 使用 OpenAI 兼容适配器，支持原生 Function Calling
+        logger.info(f"🔧 使用阿里百炼 OpenAI 兼容适配器 (支持原生工具调用)")
+        return self._build_llm_pair("dashscope", cfg, api_key=os.getenv('DASHSCOPE_API_KEY'), **_LLM_DEFAULTS)
+
+    def _build_deepseek(self, cfg):
+        # DeepSeek V3配置 - 使用支持token统计的适配器
+        deepseek_api_key = os.getenv('DEEPSEEK_API_KEY')
+        if not deepseek_api_key:
+            raise ValueError("使用DeepSeek需要设置DEEPSEEK_API_KEY环境变量")
+
+        deepseek_base_url = os.getenv('DEEPSEEK_BASE_URL', 'https://api.deepseek.com')
+
+        llms = self._build_llm_pair(
+            "deepseek", cfg, base_url=deepseek_base_url, api_key=deepseek_api_key, **_LLM_DEFAULTS
+        )
+        logger.info(f"✅ [DeepSeek] 已启用token统计功能")
+        return llms
+
+    def _build_custom_openai(self, cfg):
+        # 自定义OpenAI端点配置
+        custom_api_key = os.getenv('CUSTOM_OPENAI_API_KEY')
+        if not custom_api_key:
+            raise ValueError("使用自定义OpenAI端点需要设置CUSTOM_OPENAI_API_KEY环境变量")
+
+        custom_base_url = cfg.get("custom_openai_base_url", "https://api.openai.com/v1")
+        logger.info(f"🔧 [自定义OpenAI] 使用端点: {custom_base_url}")
+
+        llms = self._build_llm_pair(
+            "custom_openai", cfg, base_url=custom_base_url, api_key=custom_api_key, **_LLM_DEFAULTS
+        )
+        logger.info(f"✅ [自定义OpenAI] 已配置自定义端点: {custom_base_url}")
+        return llms
+
+    def _build_qianfan(self, cfg):
+        # 百度千帆（文心一言）配置 - 由适配器负责QIANFAN_API_KEY校验及默认base_url
+        llms = self._build_llm_pair("qianfan", cfg, api_key=os.getenv('QIANFAN_API_KEY'), **_LLM_DEFAULTS)
+        logger.info("✅ [千帆] 文心一言适配器已配置成功")
+        return llms
+
+    # llm_provider -> (deep_thinking_llm, quick_thinking_llm) 构建函数
+    PROVIDERS = {
+        "openai": _build_openai,
+        "siliconflow": _build_siliconflow,
+        "openrouter": _build_openrouter,
+        "ollama": _build_ollama,
+        "anthropic": _build_anthropic,
+        "google": _build_google,
+        "dashscope": _build_dashscope,
+        "deepseek": _build_deepseek,
+        "custom_openai": _build_custom_openai,
+        "qianfan": _build_qianfan,
+    }
+
+    def _with_fallbacks(self, provider, deep_llm, quick_llm):
+        """Wrap the LLM pair in circuit-breaking fallback chains over other configured providers."""
+        deep_chain, quick_chain = [(provider, deep_llm)], [(provider, quick_llm)]
+        cache_path = self._llm_cache_path(self.config)
+        request_dedup = self.config.get("llm_request_dedup", False)
+        for name in self.config.get("llm_fallback_providers", []):
+            name = _normalize_provider(name)
+            if name == provider or name not in _FALLBACK_MODELS:
+                continue
+            env_key, deep_model, quick_model, kwargs = _FALLBACK_MODELS[name]
+            api_key = os.getenv(env_key)
+            if not api_key:
+                continue
+            if name == "deepseek":
+                # 与 _build_deepseek 一致，在运行时读取自定义端点
+                kwargs = {**kwargs, "base_url": os.getenv('DEEPSEEK_BASE_URL', 'https://api.deepseek.com')}
+            try:
+                deep_chain.append((name, _get_llm(
+                    name, deep_model, api_key=api_key, cache_path=cache_path, request_dedup=request_dedup,
+                    **kwargs, **_LLM_DEFAULTS
+                )))
+                quick_chain.append((name, _get_llm(
+                    name, quick_model, api_key=api_key, cache_path=cache_path, request_dedup=request_dedup,
+                    **kwargs, **_LLM_DEFAULTS
+                )))
+            except Exception as e:
+                logger.warning(f"⚠️ [LLM降级] 无法创建备用提供商 {name}: {e}")
+
+        if len(deep_chain) == 1:
+            logger.warning("⚠️ [LLM降级] 未找到已配置密钥的备用提供商，降级链未启用")
+            return deep_llm, quick_llm
+
+        logger.info(f"🔄 [LLM降级] 已启用降级链: {' -> '.join(name for name, _ in deep_chain)}")
+        breaker_kwargs = {
+            "failure_threshold": self.config.get("llm_circuit_failure_threshold", 5),
+            "cooldown": self.config.get("llm_circuit_cooldown", 30),
+        }
+        return FallbackLLM(deep_chain, **breaker_kwargs), FallbackLLM(quick_chain, **breaker_kwargs)
+
     def _create_tool_nodes(self) -> Dict[str, ToolNode]:
         """Create tool nodes for different data sources."""
-        return {
-            "market": ToolNode(
-                [
-                    # 统一工具
-                    self.toolkit.get_stock_market_data_unified,
-                    # online tools
-                    self.toolkit.get_YFin_data_online,
-                    self.toolkit.get_stockstats_indicators_report_online,
-                    # offline tools
-                    self.toolkit.get_YFin_data,
-                    self.toolkit.get_stockstats_indicators_report,
-                ]
-            ),
-            "social": ToolNode(
-                [
-                    # online tools
-                    self.toolkit.get_stock_news_openai,
-                    # offline tools
-                    self.toolkit.get_reddit_stock_info,
-                ]
-            ),
-            "news": ToolNode(
-                [
-                    # online tools
-                    self.toolkit.get_global_news_openai,
-                    self.toolkit.get_google_news,
-                    # offline tools
-                    self.toolkit.get_finnhub_news,
-                    self.toolkit.get_reddit_news,
-                ]
-            ),
-            "fundamentals": ToolNode(
-                [
-                    # 统一工具
-                    self.toolkit.get_stock_fundamentals_unified,
-                    # offline tools
-                    self.toolkit.get_finnhub_company_insider_sentiment,
-                    self.toolkit.get_finnhub_company_insider_transactions,
-                    self.toolkit.get_simfin_balance_sheet,
-                    self.toolkit.get_simfin_cashflow,
-                    self.toolkit.get_simfin_income_stmt,
-                ]
-            ),
-        }
+        return dict(_build_tool_nodes(type(self.toolkit)))
 
-    def propagate(self, company_name, trade_date):
+    def propagate(self, company_name, trade_date, on_token=None):
         """Run the trading agents graph for a company on a specific date."""
+        return _run_coroutine_sync(
+            self.apropagate(company_name, trade_date, on_token=on_token)
+        )
 
-        # 添加详细的接收日志
-        logger.debug(f"🔍 [GRAPH DEBUG] ===== TradingAgentsGraph.propagate 接收参数 =====")
-        logger.debug(f"🔍 [GRAPH DEBUG] 接收到的company_name: '{company_name}' (类型: {type(company_name)})")
-        logger.debug(f"🔍 [GRAPH DEBUG] 接收到的trade_date: '{trade_date}' (类型: {type(trade_date)})")
+    async def apropagate(self, company_name, trade_date, on_token=None):
+        """Asynchronously run the trading agents graph for a company on a specific date.
 
-        self.ticker = company_name
-        logger.debug(f"🔍 [GRAPH DEBUG] 设置self.ticker: '{self.ticker}'")
+        Args:
+            on_token: Optional async callback ``await on_token(token, node)``
+                receiving each LLM token as it is generated, together with the
+                name of the graph node producing it. It runs on the graph's
+                event loop, so it must not block (no ``time.sleep`` or slow
+                synchronous I/O); hand tokens off to a queue instead.
+        """
+
+        # 添加详细的接收日志
+        logger.debug("🔍 [GRAPH DEBUG] ===== TradingAgentsGraph.propagate 接收参数 =====")
+        logger.debug("🔍 [GRAPH DEBUG] 接收到的company_name: '%s' (类型: %s)", company_name, type(company_name))
+        logger.debug("🔍 [GRAPH DEBUG] 接收到的trade_date: '%s' (类型: %s)", trade_date, type(trade_date))
 
         # Initialize state
-        logger.debug(f"🔍 [GRAPH DEBUG] 创建初始状态，传递参数: company_name='{company_name}', trade_date='{trade_date}'")
+        logger.debug("🔍 [GRAPH DEBUG] 创建初始状态，传递参数: company_name='%s', trade_date='%s'", company_name, trade_date)
         init_agent_state = self.propagator.create_initial_state(
             company_name, trade_date
         )
-        logger.debug(f"🔍 [GRAPH DEBUG] 初始状态中的company_of_interest: '{init_agent_state.get('company_of_interest', 'NOT_FOUND')}'")
-        logger.debug(f"🔍 [GRAPH DEBUG] 初始状态中的trade_date: '{init_agent_state.get('trade_date', 'NOT_FOUND')}'")
+        logger.debug("🔍 [GRAPH DEBUG] 初始状态中的company_of_interest: '%s'", init_agent_state.get('company_of_interest', 'NOT_FOUND'))
+        logger.debug("🔍 [GRAPH DEBUG] 初始状态中的trade_date: '%s'", init_agent_state.get('trade_date', 'NOT_FOUND'))
         args = self.propagator.get_graph_args()
 
-        if self.debug:
-            # Debug mode with tracing
-            trace = []
-            for chunk in self.graph.stream(init_agent_state, **args):
-                if len(chunk["messages"]) == 0:
-                    pass
-                else:
+        if on_token is not None:
+            # Token streaming mode - 逐个转发LLM生成的token
+            final_state = await self._astream_tokens(init_agent_state, args, on_token)
+        elif self.debug:
+            # Debug mode with tracing - 只保留最后一个状态，不缓存全部中间结果
+            # subgraphs=True 使并行分析师子图中的消息同样被打印
+            final_state = None
+            async for namespace, chunk in self.graph.astream(init_agent_state, subgraphs=True, **args):
+                if chunk["messages"]:
                     chunk["messages"][-1].pretty_print()
-                    trace.append(chunk)
-
-            final_state = trace[-1]
+                    if not namespace:
+                        final_state = chunk
         else:
             # Standard mode without tracing
-            final_state = self.graph.invoke(init_agent_state, **args)
+            final_state = await self.graph.ainvoke(init_agent_state, **args)
 
-        # Store current state for reflection
+        # Store current state for reflection - 运行结束后一并更新，重叠调用时各自记录的都是完整的一次运行
+        self.ticker = company_name
         self.curr_state = final_state
+        logger.debug("🔍 [GRAPH DEBUG] 设置self.ticker: '%s'", self.ticker)
 
-        # Log state
-        self._log_state(trade_date, final_state)
+        # Log state - 文件写入与信号提取均为阻塞调用，放到线程中执行以免阻塞事件循环
+        await asyncio.to_thread(self._log_state, trade_date, final_state)
 
         # Return decision and processed signal
-        return final_state, self.process_signal(final_state["final_trade_decision"], company_name)
+        signal = await asyncio.to_thread(
+            self.process_signal, final_state["final_trade_decision"], company_name
+        )
+        return final_state, signal
+
+    async def _astream_tokens(self, init_agent_state, args, on_token):
+        """Run the graph via astream_events, forwarding chat model tokens."""
+        final_state = None
+        streamed_runs = set()
+        async for event in self.graph.astream_events(
+            init_agent_state, config=args["config"], version="v2"
+        ):
+            kind = event["event"]
+            if kind == "on_chat_model_stream":
+                streamed_runs.add(event["run_id"])
+                token = _chunk_text(event["data"]["chunk"])
+                if token:
+                    await on_token(token, event["metadata"].get("langgraph_node"))
+            elif kind == "on_chat_model_end" and event["run_id"] in streamed_runs:
+                # 流式调用走 _stream，不经过各适配器在 _generate 中的token追踪，在此补记
+                streamed_runs.discard(event["run_id"])
+                await asyncio.to_thread(self._track_streamed_usage, event)
+            elif kind == "on_chain_end" and not event["parent_ids"]:
+                # 根运行结束事件携带图的最终状态
+                final_state = event["data"]["output"]
+        return final_state
+
+    def _track_streamed_usage(self, event):
+        """Record the token usage reported at the end of a streamed chat model call."""
+        usage = getattr(event["data"].get("output"), "usage_metadata", None)
+        if not usage:
+            return
+        try:
+            from tradingagents.config.config_manager import token_tracker
+
+            token_tracker.track_usage(
+                provider=_normalize_provider(self.config["llm_provider"]),
+                model_name=event["metadata"].get("ls_model_name", "unknown"),
+                input_tokens=usage.get("input_tokens", 0),
+                output_tokens=usage.get("output_tokens", 0),
+                session_id=f"stream_{event['run_id']}",
+                analysis_type="stock_analysis",
+            )
+        except Exception as e:
+            # token 追踪失败不应该影响主要功能
+            logger.error(f"⚠️ Token 追踪失败: {e}")
 
     def _log_state(self, trade_date, final_state):
-        """Log the final state to a JSON file."""
-        self.log_states_dict[str(trade_date)] = {
+        """Append the final state to a JSON Lines log file."""
+        entry = {
             "company_of_interest": final_state["company_of_interest"],
             "trade_date": final_state["trade_date"],
             "market_report": final_state["market_report"],
@@ -407,33 +705,39 @@ class TradingAgentsGraph:
             "final_trade_decision": final_state["final_trade_decision"],
         }
 
-        # Save to file
-        directory = Path(f"eval_results/{self.ticker}/TradingAgentsStrategy_logs/")
+        self.log_states_dict[str(trade_date)] = entry
+        self.log_states_dict.move_to_end(str(trade_date))
+        while len(self.log_states_dict) > _MAX_LOGGED_STATES:
+            self.log_states_dict.popitem(last=False)
+
+        # Append to file, one state per line - 按最终状态中的股票分目录，不依赖可能已被其他调用改写的self.ticker
+        directory = Path(f"eval_results/{final_state['company_of_interest']}/TradingAgentsStrategy_logs/")
         directory.mkdir(parents=True, exist_ok=True)
 
-        with open(
-            f"eval_results/{self.ticker}/TradingAgentsStrategy_logs/full_states_log.json",
-            "w",
-        ) as f:
-            json.dump(self.log_states_dict, f, indent=4)
+        with open(directory / "full_states_log.jsonl", "ab") as f:
+            f.write(_dumps_state_line(entry))
 
     def reflect_and_remember(self, returns_losses):
         """Reflect on decisions and update memory based on returns."""
-        self.reflector.reflect_bull_researcher(
-            self.curr_state, returns_losses, self.bull_memory
-        )
-        self.reflector.reflect_bear_researcher(
-            self.curr_state, returns_losses, self.bear_memory
-        )
-        self.reflector.reflect_trader(
-            self.curr_state, returns_losses, self.trader_memory
-        )
-        self.reflector.reflect_invest_judge(
-            self.curr_state, returns_losses, self.invest_judge_memory
-        )
-        self.reflector.reflect_risk_manager(
-            self.curr_state, returns_losses, self.risk_manager_memory
-        )
+        # 五项反思相互独立，并发执行以重叠各自的LLM调用与记忆写入
+        reflections = [
+            (self.reflector.reflect_bull_researcher, self.bull_memory),
+            (self.reflector.reflect_bear_researcher, self.bear_memory),
+            (self.reflector.reflect_trader, self.trader_memory),
+            (self.reflector.reflect_invest_judge, self.invest_judge_memory),
+            (self.reflector.reflect_risk_manager, self.risk_manager_memory),
+        ]
+        with ThreadPoolExecutor(max_workers=len(reflections)) as executor:
+            futures = [
+                executor.submit(reflect, self.curr_state, returns_losses, memory)
+                for reflect, memory in reflections
+            ]
+            for future in futures:
+                future.result()
+
+    async def areflect_and_remember(self, returns_losses):
+        """Asynchronously reflect on decisions and update memory based on returns."""
+        await asyncio.to_thread(self.reflect_and_remember, returns_losses)
 
     def process_signal(self, full_signal, stock_symbol=None):
         """Process a signal to extract the core decision."""
@@ -1,6 +1,21 @@
 # LLM Adapters for TradingAgents
-from .dashscope_adapter import ChatDashScope
-from .dashscope_openai_adapter import ChatDashScopeOpenAI
-from .google_openai_adapter import ChatGoogleOpenAI
+import importlib
+
+# 适配器按需导入，未使用的提供商SDK不会在启动时加载
+_LAZY_IMPORTS = {
+    "ChatDashScope": ".dashscope_adapter",
+    "ChatDashScopeOpenAI": ".dashscope_openai_adapter",
+    "ChatGoogleOpenAI": ".google_openai_adapter",
+}
+
+
+def __getattr__(name):
+    module_name = _LAZY_IMPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
 
 __all__ = ["ChatDashScope", "ChatDashScopeOpenAI", "ChatGoogleOpenAI"]
@@ -0,0 +1,139 @@
+"""
+LLM调用准入控制
+以并发上限（舱壁）和按token计量的令牌桶限制单个图实例的LLM调用
+"""
+
+import asyncio
+import threading
+import time
+from typing import Any, Callable, Optional, Tuple
+
+from langchain_core.messages import convert_to_messages
+from langchain_core.runnables import RunnableConfig
+
+from .proxy import LLMProxy
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+# 未配置max_tokens时预估的输出token数
+DEFAULT_OUTPUT_TOKENS = 2000
+
+
+class TokenBucket:
+    """按分钟补充的token令牌桶"""
+
+    def __init__(self, tokens_per_minute: int):
+        self.capacity = tokens_per_minute
+        self.rate = tokens_per_minute / 60.0
+        self._tokens = float(tokens_per_minute)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: int) -> float:
+        """预留tokens个令牌，返回需要等待的秒数（令牌可透支，等待期间不再被他人占用）"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            self._tokens -= tokens
+            return max(0.0, -self._tokens / self.rate)
+
+    def refund(self, tokens: int):
+        """退还未使用的预留令牌"""
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + tokens)
+
+
+class Bulkhead:
+    """
+    LLM调用舱壁
+
+    每次调用先按预估token数从令牌桶中预留额度并等待额度就绪，再占用并发名额，
+    同时进行的调用不超过max_inflight个；等待并发名额超过timeout秒时直接失败，
+    而不是无限排队。
+    """
+
+    def __init__(self, max_inflight: int = 16, tokens_per_minute: int = 30000, timeout: Optional[float] = 300.0):
+        self.max_inflight = max_inflight
+        self.timeout = timeout
+        self._semaphore = threading.BoundedSemaphore(max_inflight)
+        self._bucket = TokenBucket(tokens_per_minute)
+
+    def _reserve(self, tokens: int) -> Tuple[int, float]:
+        if tokens > self._bucket.capacity:
+            logger.warning(f"⚠️ [准入控制] 预估{tokens} tokens超过每分钟额度{self._bucket.capacity}，按满额预留")
+            tokens = self._bucket.capacity
+        wait = self._bucket.reserve(tokens)
+        if wait:
+            logger.debug(f"🔍 [准入控制] token额度不足，等待{wait:.1f}秒")
+        return tokens, wait
+
+    def _timeout_error(self) -> TimeoutError:
+        return TimeoutError(f"LLM并发调用已达上限{self.max_inflight}，等待{self.timeout}秒后仍未获得名额")
+
+    def acquire(self, tokens: int):
+        # token额度等待期间不占用并发名额
+        tokens, wait = self._reserve(tokens)
+        if wait:
+            time.sleep(wait)
+        if not self._semaphore.acquire(timeout=self.timeout):
+            self._bucket.refund(tokens)
+            raise self._timeout_error()
+
+    async def aacquire(self, tokens: int):
+        """异步获取名额；在事件循环中非阻塞地轮询，任务被取消时不会遗留已占用的名额"""
+        tokens, wait = self._reserve(tokens)
+        try:
+            if wait:
+                await asyncio.sleep(wait)
+            deadline = None if self.timeout is None else time.monotonic() + self.timeout
+            while not self._semaphore.acquire(blocking=False):
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise self._timeout_error()
+                await asyncio.sleep(0.05)
+        except BaseException:
+            self._bucket.refund(tokens)
+            raise
+
+    def release(self):
+        self._semaphore.release()
+
+
+def estimate_tokens(input: Any, max_tokens: Optional[int]) -> int:
+    """按 字符数/4 + 最大输出token数 粗略预估一次调用的token消耗"""
+    if hasattr(input, "to_messages"):
+        messages = input.to_messages()
+    elif isinstance(input, str):
+        return len(input) // 4 + (max_tokens or DEFAULT_OUTPUT_TOKENS)
+    else:
+        messages = convert_to_messages(input)
+    chars = sum(len(str(message.content)) for message in messages)
+    return chars // 4 + (max_tokens or DEFAULT_OUTPUT_TOKENS)
+
+
+class AdmissionControlledLLM(LLMProxy):
+    """经过舱壁准入控制的LLM，绑定工具后的LLM共享同一舱壁"""
+
+    def __init__(self, llm: Any, bulkhead: Bulkhead, max_tokens: Optional[int] = None):
+        super().__init__(llm)
+        self.bulkhead = bulkhead
+        self.max_tokens_estimate = max_tokens if max_tokens is not None else getattr(llm, "max_tokens", None)
+
+    def _rewrap(self, transform: Callable[[Any], Any]) -> "AdmissionControlledLLM":
+        return AdmissionControlledLLM(transform(self.llm), self.bulkhead, self.max_tokens_estimate)
+
+    def invoke(self, input, config: Optional[RunnableConfig] = None, **kwargs):
+        self.bulkhead.acquire(estimate_tokens(input, self.max_tokens_estimate))
+        try:
+            return self.llm.invoke(input, config, **kwargs)
+        finally:
+            self.bulkhead.release()
+
+    async def ainvoke(self, input, config: Optional[RunnableConfig] = None, **kwargs):
+        await self.bulkhead.aacquire(estimate_tokens(input, self.max_tokens_estimate))
+        try:
+            return await self.llm.ainvoke(input, config, **kwargs)
+        finally:
+            self.bulkhead.release()
@@ -0,0 +1,187 @@
+"""
+OpenAI Batch API后端
+将同步的chat/completions请求汇总为Batch API任务提交，以更长的等待时间换取更低的调用成本
+"""
+
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from .http_clients import HTTP2_AVAILABLE, HTTP_LIMITS, get_proxy_mounts
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+_CHAT_COMPLETIONS_PATH = "/chat/completions"
+_FINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+class BatchAPITransport(httpx.BaseTransport):
+    """
+    将chat/completions请求改走OpenAI Batch API的传输层
+
+    在collect_window秒内收集同一账号（base_url + API密钥）的非流式请求，
+    写成JSONL提交为一个批处理任务，每隔poll_interval秒轮询直到完成，
+    再按custom_id把结果还原为普通的HTTP响应。其余请求直接透传。
+    任务超过timeout秒仍未结束时取消任务，对应请求以超时失败。
+    """
+
+    def __init__(
+        self,
+        collect_window: float = 5.0,
+        poll_interval: float = 30.0,
+        timeout: float = 25 * 3600,
+        max_batch: int = 50000,
+        transport: Optional[httpx.BaseTransport] = None,
+    ):
+        self.collect_window = collect_window
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.max_batch = max_batch
+        self._transport = transport or httpx.HTTPTransport(http2=HTTP2_AVAILABLE, limits=HTTP_LIMITS)
+        self._lock = threading.Lock()
+        self._pending: Dict[Tuple[str, str], List[Tuple[str, dict, Future]]] = {}
+        self._clients: Dict[Tuple[str, str], object] = {}
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        if request.method != "POST" or not request.url.path.endswith(_CHAT_COMPLETIONS_PATH):
+            return self._transport.handle_request(request)
+        body = json.loads(request.read())
+        if body.get("stream"):
+            return self._transport.handle_request(request)
+
+        base_url = str(request.url)[: -len(_CHAT_COMPLETIONS_PATH)]
+        api_key = request.headers.get("authorization", "").removeprefix("Bearer ")
+        account = (base_url, api_key)
+        future = Future()
+        batch = None
+        with self._lock:
+            pending = self._pending.setdefault(account, [])
+            pending.append((f"request-{uuid.uuid4().hex}", body, future))
+            if len(pending) >= self.max_batch:
+                batch = self._pending.pop(account)
+            elif len(pending) == 1:
+                timer = threading.Timer(self.collect_window, self._flush, args=(account,))
+                timer.daemon = True
+                timer.start()
+
+        if batch:
+            self._submit(account, batch)
+        status_code, response_body = future.result()
+        return httpx.Response(status_code, json=response_body, request=request)
+
+    def _flush(self, account: Tuple[str, str]):
+        with self._lock:
+            batch = self._pending.pop(account, None)
+        if batch:
+            self._submit(account, batch)
+
+    def _submit(self, account: Tuple[str, str], batch: List[Tuple[str, dict, Future]]):
+        try:
+            results = self._run_batch(account, batch)
+        except Exception as e:
+            logger.error(f"❌ [Batch API] 批处理任务失败: {e}")
+            for _, _, future in batch:
+                future.set_exception(e)
+            return
+
+        for custom_id, _, future in batch:
+            result = results.get(custom_id)
+            if result is None:
+                future.set_exception(RuntimeError(f"Batch API未返回请求 {custom_id} 的结果"))
+            else:
+                future.set_result(result)
+
+    def _run_batch(self, account: Tuple[str, str], batch: List[Tuple[str, dict, Future]]) -> Dict[str, Tuple[int, dict]]:
+        client = self._get_openai_client(*account)
+        lines = [
+            json.dumps(
+                {"custom_id": custom_id, "method": "POST", "url": f"/v1{_CHAT_COMPLETIONS_PATH}", "body": body},
+                ensure_ascii=False,
+            )
+            for custom_id, body, _ in batch
+        ]
+        input_file = client.files.create(
+            file=("batch.jsonl", "\n".join(lines).encode("utf-8")), purpose="batch"
+        )
+        job = client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=f"/v1{_CHAT_COMPLETIONS_PATH}",
+            completion_window="24h",
+        )
+        logger.info(f"📦 [Batch API] 已提交批处理任务 {job.id}，共{len(batch)}个请求")
+
+        deadline = time.monotonic() + self.timeout
+        while job.status not in _FINAL_STATUSES:
+            if time.monotonic() >= deadline:
+                client.batches.cancel(job.id)
+                raise TimeoutError(f"Batch API任务 {job.id} 超过{self.timeout}秒仍未完成，已取消")
+            time.sleep(self.poll_interval)
+            job = client.batches.retrieve(job.id)
+        logger.info(f"📦 [Batch API] 批处理任务 {job.id} 结束，状态: {job.status}")
+
+        results = {}
+        for file_id in (job.output_file_id, job.error_file_id):
+            if not file_id:
+                continue
+            for line in client.files.content(file_id).text.splitlines():
+                if not line.strip():
+                    continue
+                item = json.loads(line)
+                response = item.get("response")
+                if response:
+                    results[item["custom_id"]] = (response["status_code"], response["body"])
+                else:
+                    results[item["custom_id"]] = (500, {"error": item.get("error")})
+        return results
+
+    def _get_openai_client(self, base_url: str, api_key: str):
+        # 文件上传与任务轮询走原始传输层，避免再次进入批处理
+        from openai import OpenAI
+
+        with self._lock:
+            client = self._clients.get((base_url, api_key))
+            if client is None:
+                client = OpenAI(
+                    api_key=api_key,
+                    base_url=base_url,
+                    http_client=httpx.Client(transport=self._transport, follow_redirects=True),
+                )
+                self._clients[(base_url, api_key)] = client
+        return client
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+_batch_clients: Dict[Tuple[float, float, float], httpx.Client] = {}
+_batch_client_lock = threading.Lock()
+
+
+def get_batch_http_client(
+    collect_window: float = 5.0, poll_interval: float = 30.0, timeout: float = 25 * 3600
+) -> httpx.Client:
+    """获取进程内共享的Batch API同步HTTP客户端（按批处理参数区分）"""
+    key = (collect_window, poll_interval, timeout)
+
+    def build(**kwargs) -> BatchAPITransport:
+        # 每个代理挂载各自汇总请求；同一地址总是路由到同一挂载，文件上传与轮询也走该代理
+        return BatchAPITransport(
+            collect_window=collect_window,
+            poll_interval=poll_interval,
+            timeout=timeout,
+            transport=httpx.HTTPTransport(http2=HTTP2_AVAILABLE, limits=HTTP_LIMITS, **kwargs),
+        )
+
+    with _batch_client_lock:
+        client = _batch_clients.get(key)
+        if client is None:
+            client = httpx.Client(transport=build(), mounts=get_proxy_mounts(build), follow_redirects=True)
+            _batch_clients[key] = client
+    return client
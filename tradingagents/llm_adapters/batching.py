@@ -0,0 +1,173 @@
+"""
+LLM请求微批处理
+将短时间窗口内并发到达的独立提示合并为一次LLM调用，再按任务ID拆分结果
+"""
+
+import json
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Dict, List, Tuple
+
+from langchain_core.messages import AIMessage, convert_to_messages
+
+from .proxy import LLMProxy
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+
+BATCH_SYSTEM_PROMPT = """你将收到若干个相互独立的任务，每个任务包含id和一组messages。
+请逐一完成每个任务，每个任务只依据其自身的messages作答，任务之间互不影响。
+只返回一个JSON数组，不要输出任何其他内容，格式如下：
+[{"id": 0, "output": "任务0的完整回复"}, {"id": 1, "output": "任务1的完整回复"}]"""
+
+
+class MicroBatcher:
+    """
+    对同一LLM的并发invoke调用进行微批处理
+
+    在max_wait_ms窗口内收集最多max_batch个提示，带任务ID合并为一次请求发送，
+    再将结果分发回各调用方。批次只有一个提示、或合并结果无法解析时，
+    退回为逐个调用。仅适用于不绑定工具的纯文本调用。
+    """
+
+    def __init__(self, llm, max_batch: int = 8, max_wait_ms: int = 20):
+        self.llm = llm
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._lock = threading.Lock()
+        self._pending: List[Tuple[Any, Future]] = []
+
+    def __getattr__(self, name):
+        # 其余属性（model_name等）透传给被包装的LLM
+        if name == "llm":
+            raise AttributeError(name)
+        return getattr(self.llm, name)
+
+    def invoke(self, messages, config=None, **kwargs) -> AIMessage:
+        """提交一个提示，阻塞直到其所在批次返回结果"""
+        if config is not None or kwargs:
+            # 带有运行配置或额外调用参数的请求无法与其他请求合并
+            return self.llm.invoke(messages, config, **kwargs)
+
+        future = Future()
+        batch = None
+        with self._lock:
+            self._pending.append((messages, future))
+            if len(self._pending) >= self.max_batch:
+                batch = self._take_pending()
+            elif len(self._pending) == 1:
+                timer = threading.Timer(self.max_wait, self._flush)
+                timer.daemon = True
+                timer.start()
+
+        if batch:
+            self._dispatch(batch)
+        return future.result()
+
+    def _take_pending(self) -> List[Tuple[Any, Future]]:
+        batch, self._pending = self._pending, []
+        return batch
+
+    def _flush(self):
+        with self._lock:
+            batch = self._take_pending()
+        if batch:
+            self._dispatch(batch)
+
+    def _dispatch(self, batch: List[Tuple[Any, Future]]):
+        if len(batch) == 1:
+            self._invoke_individually(batch)
+            return
+
+        try:
+            response = self.llm.invoke(self._build_batch_messages(batch))
+            outputs = self._parse_batch_response(response.content)
+        except Exception as e:
+            logger.warning(f"⚠️ [微批处理] 合并请求失败，改为逐个调用: {e}")
+            outputs = {}
+
+        remaining = []
+        for index, (_, future) in enumerate(batch):
+            if index in outputs:
+                future.set_result(AIMessage(content=outputs[index]))
+            else:
+                remaining.append(batch[index])
+
+        if remaining:
+            logger.debug(f"🔍 [微批处理] {len(remaining)}/{len(batch)} 个任务未能拆分，逐个调用")
+            self._invoke_individually(remaining)
+        else:
+            logger.debug(f"🔍 [微批处理] {len(batch)} 个任务合并为一次调用")
+
+    def _invoke_individually(self, batch: List[Tuple[Any, Future]]):
+        results = self.llm.batch([messages for messages, _ in batch], return_exceptions=True)
+        for (_, future), result in zip(batch, results):
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    @staticmethod
+    def _build_batch_messages(batch: List[Tuple[Any, Future]]) -> List[Tuple[str, str]]:
+        tasks = []
+        for index, (messages, _) in enumerate(batch):
+            tasks.append({
+                "id": index,
+                "messages": [
+                    {"role": message.type, "content": message.content}
+                    for message in convert_to_messages(messages)
+                ],
+            })
+        return [
+            ("system", BATCH_SYSTEM_PROMPT),
+            ("human", json.dumps(tasks, ensure_ascii=False)),
+        ]
+
+    @staticmethod
+    def _parse_batch_response(content: str) -> Dict[int, str]:
+        json_match = re.search(r'\[.*\]', content, re.DOTALL)
+        if not json_match:
+            return {}
+        outputs = {}
+        for item in json.loads(json_match.group()):
+            if isinstance(item, dict) and isinstance(item.get("id"), int) and "output" in item:
+                output = item["output"]
+                outputs[item["id"]] = output if isinstance(output, str) else json.dumps(output, ensure_ascii=False)
+        return outputs
+
+
+# 微批处理器挂在 _get_llm 缓存的共享LLM上，数量与其缓存上限一致
+_MAX_BATCHERS = 32
+_batchers: "OrderedDict[int, MicroBatcher]" = OrderedDict()
+_batchers_lock = threading.Lock()
+
+
+def get_micro_batcher(llm, max_batch: int = 8, max_wait_ms: int = 20) -> MicroBatcher:
+    """获取LLM对应的共享微批处理器，使多个图实例的并发请求可以合并"""
+    key = id(llm)
+    with _batchers_lock:
+        batcher = _batchers.get(key)
+        if batcher is None or batcher.llm is not llm:
+            batcher = MicroBatcher(llm, max_batch=max_batch, max_wait_ms=max_wait_ms)
+            _batchers[key] = batcher
+        _batchers.move_to_end(key)
+        while len(_batchers) > _MAX_BATCHERS:
+            _batchers.popitem(last=False)
+    return batcher
+
+
+def with_micro_batching(llm, max_batch: int = 8, max_wait_ms: int = 20):
+    """
+    在共享的底层LLM上启用微批处理
+
+    降级链、准入控制等代理按图实例创建，若以代理为键则每个图各自一个批处理器，
+    无法跨图合并。因此穿过代理，把批处理器挂在代理内部的共享LLM上，
+    代理本身保持不变，请求仍经过本图的降级与准入控制。
+    """
+    if isinstance(llm, LLMProxy):
+        return llm._rewrap(lambda inner: with_micro_batching(inner, max_batch, max_wait_ms))
+    return get_micro_batcher(llm, max_batch=max_batch, max_wait_ms=max_wait_ms)
@@ -0,0 +1,180 @@
+"""
+LLM提供商熔断与降级链
+主提供商连续失败后熔断一段时间，期间请求直接路由到下一个可用的提供商
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import httpx
+from langchain_core.runnables import RunnableConfig
+
+from .proxy import LLMProxy
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+# 计为提供商故障的连接/超时错误；各SDK的连接错误不继承内置ConnectionError，已安装时追加
+_TRANSIENT_ERRORS: Tuple[type, ...] = (TimeoutError, ConnectionError, httpx.TransportError)
+try:
+    from openai import APIConnectionError as OpenAIConnectionError
+    _TRANSIENT_ERRORS += (OpenAIConnectionError,)
+except ImportError:
+    pass
+try:
+    from anthropic import APIConnectionError as AnthropicConnectionError
+    _TRANSIENT_ERRORS += (AnthropicConnectionError,)
+except ImportError:
+    pass
+
+
+def _is_provider_failure(error: Exception) -> bool:
+    """
+    判断错误是否由提供商侧故障引起
+
+    限流（429）、5xx、连接与超时错误计入熔断并触发降级；400等请求本身的错误
+    （参数错误、内容审核等）换提供商也无济于事，直接抛出且不影响熔断状态。
+    """
+    if isinstance(error, _TRANSIENT_ERRORS):
+        return True
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    if status is None and isinstance(getattr(error, "code", None), int):
+        # google.api_core异常以code保存HTTP状态码
+        status = error.code
+    return isinstance(status, int) and (status == 429 or status >= 500)
+
+
+class CircuitBreaker:
+    """
+    单个提供商的熔断器
+
+    连续失败达到failure_threshold次后熔断，cooldown秒内拒绝请求；
+    冷却结束后放行一次试探请求，成功则恢复，失败则重新熔断。
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, cooldown: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def allow(self) -> bool:
+        """是否允许向该提供商发送请求"""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at >= self.cooldown:
+                # 半开状态：放行一次试探请求，其余请求继续等待新的冷却期
+                self._opened_at = time.monotonic()
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info(f"✅ [LLM熔断] {self.name} 已恢复")
+            self._failures = 0
+            self._opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    logger.warning(
+                        f"⚠️ [LLM熔断] {self.name} 连续失败{self._failures}次，熔断{self.cooldown}秒"
+                    )
+                self._opened_at = time.monotonic()
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(provider: str, failure_threshold: int = 5, cooldown: float = 30.0) -> CircuitBreaker:
+    """获取提供商共享的熔断器，使所有图实例共享同一提供商的健康状态"""
+    with _breakers_lock:
+        breaker = _breakers.get(provider)
+        if breaker is None:
+            breaker = CircuitBreaker(provider, failure_threshold=failure_threshold, cooldown=cooldown)
+            _breakers[provider] = breaker
+    return breaker
+
+
+class FallbackLLM(LLMProxy):
+    """
+    带熔断的LLM降级链
+
+    按顺序尝试chain中的(提供商, LLM)，跳过已熔断的提供商；全部熔断时仍按原顺序尝试。
+    只有提供商故障（见 _is_provider_failure）才计入熔断并尝试下一个提供商，其余错误直接抛出。
+    对外表现为主LLM；bind_tools会为链上每个LLM分别绑定工具。
+    """
+
+    def __init__(self, chain: List[Tuple[str, Any]], failure_threshold: int = 5, cooldown: float = 30.0):
+        super().__init__(chain[0][1])
+        self.chain = chain
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+
+    def _rewrap(self, transform: Callable[[Any], Any]) -> "FallbackLLM":
+        return FallbackLLM(
+            [(provider, transform(llm)) for provider, llm in self.chain],
+            failure_threshold=self.failure_threshold,
+            cooldown=self.cooldown,
+        )
+
+    def _candidates(self) -> Iterator[Tuple[str, Any, CircuitBreaker]]:
+        chain = [
+            (provider, llm, get_circuit_breaker(provider, self.failure_threshold, self.cooldown))
+            for provider, llm in self.chain
+        ]
+        allowed = False
+        for candidate in chain:
+            # 轮到该提供商时才检查熔断状态，前面的提供商成功时不会消耗后面的半开试探名额
+            if candidate[2].allow():
+                allowed = True
+                yield candidate
+        if not allowed:
+            yield from chain
+
+    def invoke(self, input, config: Optional[RunnableConfig] = None, **kwargs):
+        last_error = None
+        for provider, llm, breaker in self._candidates():
+            try:
+                result = llm.invoke(input, config, **kwargs)
+            except Exception as e:
+                if not _is_provider_failure(e):
+                    raise
+                breaker.record_failure()
+                logger.warning(f"⚠️ [LLM降级] {provider} 调用失败，尝试下一个提供商: {e}")
+                last_error = e
+                continue
+            breaker.record_success()
+            return result
+        raise last_error
+
+    async def ainvoke(self, input, config: Optional[RunnableConfig] = None, **kwargs):
+        last_error = None
+        for provider, llm, breaker in self._candidates():
+            try:
+                result = await llm.ainvoke(input, config, **kwargs)
+            except Exception as e:
+                if not _is_provider_failure(e):
+                    raise
+                breaker.record_failure()
+                logger.warning(f"⚠️ [LLM降级] {provider} 调用失败，尝试下一个提供商: {e}")
+                last_error = e
+                continue
+            breaker.record_success()
+            return result
+        raise last_error
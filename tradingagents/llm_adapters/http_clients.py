@@ -0,0 +1,160 @@
+"""
+LLM HTTP客户端管理
+为所有OpenAI兼容的LLM客户端提供共享的HTTP/2连接，可选的在途请求去重，并按x-ratelimit响应头自适应限流
+"""
+
+import asyncio
+import functools
+import ipaddress
+import threading
+import urllib.request
+import weakref
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+import httpx
+
+from .rate_limiter import AsyncRateLimitedTransport, RateLimitedTransport
+from .request_dedup import AsyncDedupTransport, DedupTransport
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+# HTTP/2 依赖 h2 包，未安装时降级为 HTTP/1.1
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+    logger.warning("⚠️ 未安装h2，LLM客户端将使用HTTP/1.1（pip install httpx[http2]）")
+
+# 深度/快速思考模型、各分析师与辩论轮次共享同一连接池
+HTTP_LIMITS = httpx.Limits(max_connections=128, max_keepalive_connections=64)
+
+T = TypeVar("T")
+
+
+def _no_proxy_pattern(host: str) -> str:
+    """把NO_PROXY中的一项转换为httpx的URL匹配模式"""
+    if "://" in host:
+        return host
+    try:
+        address = ipaddress.ip_address(host)
+        return f"all://[{host}]" if address.version == 6 else f"all://{host}"
+    except ValueError:
+        pass
+    if host.lower() == "localhost":
+        return f"all://{host}"
+    return f"all://*{host.lstrip('.')}"
+
+
+def get_proxy_mounts(build: Callable[..., T]) -> Dict[str, Optional[T]]:
+    """
+    按环境变量中的代理设置（HTTP(S)_PROXY、ALL_PROXY、NO_PROXY）构建httpx挂载表
+
+    httpx在显式传入transport时不会读取环境代理，因此共享客户端需要自行挂载：
+    每个代理地址调用 build(proxy=url) 构建带相同包装层的传输层，
+    NO_PROXY中的主机挂载为None（直连，使用客户端的默认传输层）。
+    """
+    proxies = urllib.request.getproxies()
+    mounts: Dict[str, Optional[T]] = {}
+    for scheme in ("all", "http", "https"):
+        url = proxies.get(scheme)
+        if url:
+            mounts[f"{scheme}://"] = build(proxy=url if "://" in url else f"http://{url}")
+    if not mounts:
+        return mounts
+
+    for host in proxies.get("no", "").split(","):
+        host = host.strip()
+        if host == "*":
+            return {}
+        if host:
+            mounts[_no_proxy_pattern(host)] = None
+    return mounts
+
+
+def _build_sync_transport(dedup: bool = False, **kwargs) -> httpx.BaseTransport:
+    transport = RateLimitedTransport(httpx.HTTPTransport(http2=HTTP2_AVAILABLE, limits=HTTP_LIMITS, **kwargs))
+    return DedupTransport(transport) if dedup else transport
+
+
+def _build_async_transport(dedup: bool = False, **kwargs) -> httpx.AsyncBaseTransport:
+    transport = AsyncRateLimitedTransport(
+        LoopLocalAsyncTransport(http2=HTTP2_AVAILABLE, limits=HTTP_LIMITS, **kwargs)
+    )
+    return AsyncDedupTransport(transport) if dedup else transport
+
+
+class LoopLocalAsyncTransport(httpx.AsyncBaseTransport):
+    """
+    按事件循环隔离连接池的异步传输层
+
+    httpx的连接绑定在创建它的事件循环上，而 propagate() 每次都会通过
+    asyncio.run() 新建事件循环，因此为每个循环单独维护一个连接池，
+    使共享的 AsyncClient 可以跨多次调用安全复用。
+    """
+
+    def __init__(self, **transport_kwargs):
+        self._transport_kwargs = transport_kwargs
+        self._transports = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def _get_transport(self) -> httpx.AsyncHTTPTransport:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            transport = self._transports.get(loop)
+            if transport is None:
+                transport = httpx.AsyncHTTPTransport(**self._transport_kwargs)
+                self._transports[loop] = transport
+        return transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return await self._get_transport().handle_async_request(request)
+
+    async def aclose(self) -> None:
+        transport = None
+        try:
+            loop = asyncio.get_running_loop()
+            with self._lock:
+                transport = self._transports.pop(loop, None)
+        except RuntimeError:
+            pass
+        if transport is not None:
+            await transport.aclose()
+
+
+# 按是否开启在途请求去重区分客户端，去重只作用于开启了 llm_request_dedup 的配置
+_sync_clients: Dict[bool, httpx.Client] = {}
+_async_clients: Dict[bool, httpx.AsyncClient] = {}
+_client_lock = threading.Lock()
+
+
+def get_http_client(dedup: bool = False) -> httpx.Client:
+    """获取进程内共享的同步HTTP客户端（优先HTTP/2多路复用）"""
+    with _client_lock:
+        client = _sync_clients.get(dedup)
+        if client is None:
+            build = functools.partial(_build_sync_transport, dedup)
+            client = httpx.Client(transport=build(), mounts=get_proxy_mounts(build), follow_redirects=True)
+            _sync_clients[dedup] = client
+    return client
+
+
+def get_async_http_client(dedup: bool = False) -> httpx.AsyncClient:
+    """获取进程内共享的异步HTTP客户端（优先HTTP/2多路复用）"""
+    with _client_lock:
+        client = _async_clients.get(dedup)
+        if client is None:
+            build = functools.partial(_build_async_transport, dedup)
+            client = httpx.AsyncClient(transport=build(), mounts=get_proxy_mounts(build), follow_redirects=True)
+            _async_clients[dedup] = client
+    return client
+
+
+def get_openai_http_kwargs(dedup: bool = False) -> Dict[str, Any]:
+    """ChatOpenAI及其兼容子类使用的共享HTTP客户端参数"""
+    return {
+        "http_client": get_http_client(dedup),
+        "http_async_client": get_async_http_client(dedup),
+    }
@@ -0,0 +1,78 @@
+"""
+LLM响应磁盘缓存
+按提示与模型参数的SHA-256哈希缓存LLM响应，重复回测相同股票/日期时跳过LLM调用
+"""
+
+import functools
+import hashlib
+import os
+import sqlite3
+import threading
+from typing import Any, Optional
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.load import dumps, loads
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+
+class SQLiteLLMCache(BaseCache):
+    """
+    基于SQLite的LangChain LLM缓存
+
+    缓存键为 llm_string（模型、温度、绑定的工具等调用参数）与提示的SHA-256哈希，
+    值为序列化后的生成结果。连接在线程间共享，读写由锁串行化。
+    """
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+        )
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\x00{prompt}".encode("utf-8")).hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM llm_cache WHERE key = ?", (self._key(prompt, llm_string),)
+            ).fetchone()
+        if row is None:
+            return None
+        try:
+            return loads(row[0])
+        except Exception as e:
+            logger.warning(f"⚠️ [LLM缓存] 缓存条目反序列化失败，忽略: {e}")
+            return None
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        try:
+            value = dumps(list(return_val))
+        except Exception as e:
+            logger.warning(f"⚠️ [LLM缓存] 响应无法序列化，跳过缓存: {e}")
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value) VALUES (?, ?)",
+                (self._key(prompt, llm_string), value),
+            )
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+
+
+@functools.lru_cache(maxsize=None)
+def get_llm_cache(path: str) -> SQLiteLLMCache:
+    """获取指定路径共享的LLM缓存"""
+    path = os.path.expanduser(path)
+    logger.info(f"💾 [LLM缓存] 已启用磁盘缓存: {path}")
+    return SQLiteLLMCache(path)
@@ -0,0 +1,38 @@
+"""
+LLM代理基类
+包装LLM调用（降级、准入控制等）的同时对外保持被包装LLM的类型与属性
+"""
+
+from abc import abstractmethod
+from typing import Any, Callable
+
+from langchain_core.runnables import Runnable
+
+
+class LLMProxy(Runnable):
+    """
+    对外表现为被包装LLM的Runnable代理
+
+    分析师按 llm.__class__.__name__ 区分模型（Google、DashScope等）并读取
+    model_name等属性，因此代理返回被包装LLM的类型并透传其属性；
+    bind_tools 通过子类的 _rewrap 在绑定工具后的LLM上重新包装。
+    """
+
+    def __init__(self, llm: Any):
+        self.llm = llm
+
+    @property
+    def __class__(self):
+        return self.llm.__class__
+
+    def __getattr__(self, name):
+        if name == "llm":
+            raise AttributeError(name)
+        return getattr(self.llm, name)
+
+    def bind_tools(self, tools, **kwargs) -> "LLMProxy":
+        return self._rewrap(lambda llm: llm.bind_tools(tools, **kwargs))
+
+    @abstractmethod
+    def _rewrap(self, transform: Callable[[Any], Any]) -> "LLMProxy":
+        """返回对被包装的每个LLM应用transform后重新包装的同类代理"""
@@ -0,0 +1,206 @@
+"""
+基于x-ratelimit响应头的自适应并发控制
+在HTTP传输层按账号（主机 + API密钥）限制并发与请求速率，提前避开提供商的限流
+"""
+
+import asyncio
+import hashlib
+import re
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional, Tuple
+
+import httpx
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+# 单个账号的最大并发请求数
+DEFAULT_MAX_CONCURRENCY = 64
+# 请求速率统计窗口（秒），与提供商的RPM口径一致
+RATE_WINDOW = 60.0
+
+_DURATION_PATTERN = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def _parse_duration(value: Optional[str]) -> Optional[float]:
+    """解析 "1s"、"6m0s"、"20ms" 或纯秒数形式的重置时间"""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PATTERN.findall(value)
+    if not parts:
+        return None
+    return sum(float(number) * _DURATION_UNITS[unit] for number, unit in parts)
+
+
+def _parse_int(value: Optional[str]) -> Optional[int]:
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class AdaptiveLimiter:
+    """
+    单个账号（主机 + API密钥）的自适应限流器
+
+    并发上限按AIMD调整：成功时加一，429时减半，并且不超过服务端返回的
+    x-ratelimit-remaining-requests；同时按x-ratelimit-limit-requests在60秒
+    滑动窗口内限制请求数。剩余请求数或token数耗尽、或收到429时，
+    暂停发送直到服务端给出的重置时间。
+    """
+
+    def __init__(self, host: str, max_concurrency: int = DEFAULT_MAX_CONCURRENCY):
+        self.host = host
+        self.max_concurrency = max_concurrency
+        self.limit = max_concurrency
+        self._condition = threading.Condition()
+        self._inflight = 0
+        self._window = deque()
+        self._rpm_limit: Optional[int] = None
+        self._resume_at = 0.0
+
+    def _try_enter(self) -> float:
+        """尝试占用一个请求名额，成功返回0，否则返回建议等待的秒数"""
+        now = time.monotonic()
+        if now < self._resume_at:
+            return self._resume_at - now
+        if self._inflight >= self.limit:
+            return 0.05
+        while self._window and now - self._window[0] >= RATE_WINDOW:
+            self._window.popleft()
+        if self._rpm_limit and len(self._window) >= self._rpm_limit:
+            return self._window[0] + RATE_WINDOW - now
+        self._inflight += 1
+        self._window.append(now)
+        return 0.0
+
+    def acquire(self):
+        with self._condition:
+            while True:
+                wait = self._try_enter()
+                if not wait:
+                    return
+                self._condition.wait(wait)
+
+    async def aacquire(self):
+        while True:
+            with self._condition:
+                wait = self._try_enter()
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+    def release(self, response: Optional[httpx.Response] = None):
+        with self._condition:
+            self._inflight -= 1
+            if response is not None:
+                self._update(response)
+            self._condition.notify_all()
+
+    def _update(self, response: httpx.Response):
+        headers = response.headers
+        now = time.monotonic()
+
+        rpm_limit = _parse_int(headers.get("x-ratelimit-limit-requests"))
+        if rpm_limit:
+            self._rpm_limit = rpm_limit
+
+        if response.status_code == 429:
+            self.limit = max(1, self.limit // 2)
+            delay = _parse_duration(headers.get("retry-after")) or _parse_duration(
+                headers.get("x-ratelimit-reset-requests")
+            ) or 1.0
+            self._resume_at = max(self._resume_at, now + delay)
+            logger.warning(f"⚠️ [限流] {self.host} 返回429，并发上限降至{self.limit}，暂停{delay:.1f}秒")
+            return
+
+        remaining_requests = _parse_int(headers.get("x-ratelimit-remaining-requests"))
+        remaining_tokens = _parse_int(headers.get("x-ratelimit-remaining-tokens"))
+
+        self.limit = min(self.max_concurrency, self.limit + 1)
+        if remaining_requests is not None:
+            self.limit = max(1, min(self.limit, remaining_requests))
+
+        # 剩余额度耗尽时暂停到重置时间，避免请求被服务端拒绝后重试
+        if remaining_requests == 0:
+            delay = _parse_duration(headers.get("x-ratelimit-reset-requests"))
+            if delay:
+                self._resume_at = max(self._resume_at, now + delay)
+        if remaining_tokens == 0:
+            delay = _parse_duration(headers.get("x-ratelimit-reset-tokens"))
+            if delay:
+                self._resume_at = max(self._resume_at, now + delay)
+
+
+_limiters: Dict[Tuple[str, str], AdaptiveLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(host: str, authorization: str = "") -> AdaptiveLimiter:
+    """
+    获取账号共享的限流器，使同步与异步客户端共享同一限流状态
+
+    限流额度按API密钥计算，因此按 (主机, 密钥哈希) 区分：一个密钥收到429
+    或额度耗尽，不会限制同一主机上的其他账号。只保存密钥的哈希值。
+    """
+    key = (host, hashlib.sha256(authorization.encode("utf-8")).hexdigest())
+    with _limiters_lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            limiter = AdaptiveLimiter(host)
+            _limiters[key] = limiter
+    return limiter
+
+
+def _limiter_for(request: httpx.Request) -> AdaptiveLimiter:
+    return get_rate_limiter(request.url.host, request.headers.get("authorization", ""))
+
+
+class RateLimitedTransport(httpx.BaseTransport):
+    """为同步传输层增加按账号的自适应限流"""
+
+    def __init__(self, transport: httpx.BaseTransport):
+        self._transport = transport
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        limiter = _limiter_for(request)
+        limiter.acquire()
+        response = None
+        try:
+            response = self._transport.handle_request(request)
+            return response
+        finally:
+            # 包括取消、中断在内的任何退出都必须归还名额
+            limiter.release(response)
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+class AsyncRateLimitedTransport(httpx.AsyncBaseTransport):
+    """为异步传输层增加按账号的自适应限流"""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self._transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        limiter = _limiter_for(request)
+        await limiter.aacquire()
+        response = None
+        try:
+            response = await self._transport.handle_async_request(request)
+            return response
+        finally:
+            # 包括取消、中断在内的任何退出都必须归还名额
+            limiter.release(response)
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
@@ -0,0 +1,157 @@
+"""
+LLM请求在途去重
+完全相同的并发请求（同一地址、密钥与请求体）只发送一次，共享同一个响应
+默认关闭，开启 llm_request_dedup 的配置使用单独的去重客户端
+"""
+
+import asyncio
+import hashlib
+import json
+import threading
+from concurrent.futures import Future
+from typing import Dict, Optional, Tuple
+
+import httpx
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+
+def _dedup_key(request: httpx.Request) -> Optional[str]:
+    """计算请求的去重键，流式请求及非POST请求不参与去重"""
+    if request.method != "POST":
+        return None
+    body = request.read()
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        return None
+    if not isinstance(payload, dict) or payload.get("stream"):
+        return None
+    digest = hashlib.sha256()
+    digest.update(str(request.url).encode("utf-8"))
+    digest.update(request.headers.get("authorization", "").encode("utf-8"))
+    digest.update(body)
+    return digest.hexdigest()
+
+
+def _build_response(request: httpx.Request, result: Tuple[int, httpx.Headers, bytes]) -> httpx.Response:
+    status_code, headers, raw = result
+    # raw为未解码的原始字节，由客户端按响应头中的Content-Encoding解码
+    return httpx.Response(status_code, headers=headers, content=raw, request=request)
+
+
+class _OwnerCancelled(Exception):
+    """在途请求的发起方被取消或中断，等待者需要重新发送请求"""
+
+
+class _InflightRequests:
+    """在途请求表：同一去重键只有一个发起方，其余相同请求等待其结果"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._futures: Dict[str, Future] = {}
+
+    def claim(self, key: str) -> Tuple[Future, bool]:
+        """返回该键的Future以及调用方是否成为发起方"""
+        with self._lock:
+            future = self._futures.get(key)
+            if future is not None:
+                return future, False
+            future = self._futures[key] = Future()
+            return future, True
+
+    def complete(self, key: str, future: Future, result=None, error: Optional[BaseException] = None):
+        # 先移出在途表，重试的等待者不会再拿到已结束的Future
+        with self._lock:
+            self._futures.pop(key, None)
+        if error is None:
+            future.set_result(result)
+        elif isinstance(error, Exception):
+            future.set_exception(error)
+        else:
+            # 发起方被取消或中断时不把取消传给其他等待者，由它们重新发送请求
+            future.set_exception(_OwnerCancelled())
+
+
+class DedupTransport(httpx.BaseTransport):
+    """为同步传输层增加在途请求去重"""
+
+    def __init__(self, transport: httpx.BaseTransport):
+        self._transport = transport
+        self._inflight = _InflightRequests()
+
+    def _fetch(self, request: httpx.Request) -> Tuple[int, httpx.Headers, bytes]:
+        response = self._transport.handle_request(request)
+        try:
+            raw = b"".join(response.iter_raw())
+        finally:
+            response.close()
+        return response.status_code, response.headers, raw
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        key = _dedup_key(request)
+        if key is None:
+            return self._transport.handle_request(request)
+
+        while True:
+            future, owner = self._inflight.claim(key)
+            if owner:
+                try:
+                    result = self._fetch(request)
+                except BaseException as e:
+                    self._inflight.complete(key, future, error=e)
+                    raise
+                self._inflight.complete(key, future, result=result)
+                return _build_response(request, result)
+
+            logger.debug(f"🔍 [请求去重] 复用在途的相同请求: {request.url.path}")
+            try:
+                return _build_response(request, future.result())
+            except _OwnerCancelled:
+                logger.debug(f"🔍 [请求去重] 在途请求已取消，重新发送: {request.url.path}")
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+class AsyncDedupTransport(httpx.AsyncBaseTransport):
+    """为异步传输层增加在途请求去重（可跨事件循环共享）"""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self._transport = transport
+        self._inflight = _InflightRequests()
+
+    async def _fetch(self, request: httpx.Request) -> Tuple[int, httpx.Headers, bytes]:
+        response = await self._transport.handle_async_request(request)
+        try:
+            raw = b"".join([chunk async for chunk in response.aiter_raw()])
+        finally:
+            await response.aclose()
+        return response.status_code, response.headers, raw
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        key = _dedup_key(request)
+        if key is None:
+            return await self._transport.handle_async_request(request)
+
+        while True:
+            future, owner = self._inflight.claim(key)
+            if owner:
+                try:
+                    result = await self._fetch(request)
+                except BaseException as e:
+                    self._inflight.complete(key, future, error=e)
+                    raise
+                self._inflight.complete(key, future, result=result)
+                return _build_response(request, result)
+
+            logger.debug(f"🔍 [请求去重] 复用在途的相同请求: {request.url.path}")
+            try:
+                return _build_response(request, await asyncio.wrap_future(future))
+            except _OwnerCancelled:
+                logger.debug(f"🔍 [请求去重] 在途请求已取消，重新发送: {request.url.path}")
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()